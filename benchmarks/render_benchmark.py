@@ -0,0 +1,304 @@
+"""
+Synthetic render benchmark for VideoEngine and subtitle_renderer.
+
+Generates every fixture itself (no LLM, TTS, Reddit or image search):
+solid/noise background videos, a sine-wave narration, word-timing JSON at a
+configurable word rate and placeholder meme images. Each case runs in a fresh
+subprocess so peak RSS is per case. Results are written as JSON so runs can be
+compared between commits.
+
+Usage (from the repo root):
+    python -m benchmarks.render_benchmark
+    python -m benchmarks.render_benchmark --lengths 15 60 120 --modes classic brainrot \\
+        --backends moviepy ffmpeg --quality final --output bench_results.json
+    python -m benchmarks.render_benchmark --suite subtitles --lengths 90
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VOCABULARY = (
+    "the I my WHAT?! and she he was to a it that bro no way my best friend said "
+    "apartment lock the doors you are the problem GUILTY! run storage unit then"
+).split()
+
+# --- Fixtures ---
+def _ffmpeg(*args):
+    subprocess.run(["ffmpeg", "-y", "-hide_banner", "-loglevel", "error"] + list(args), check=True)
+
+def make_fixtures(workspace, lengths, words_per_second, background="color", font_path=None):
+    """Creates backgrounds, BGM, narration + word timings per length, and the font in workspace."""
+    os.makedirs(os.path.join(workspace, "assets", "backgrounds"), exist_ok=True)
+    os.makedirs(os.path.join(workspace, "assets", "top_backgrounds"), exist_ok=True)
+    os.makedirs(os.path.join(workspace, "assets", "music"), exist_ok=True)
+    os.makedirs(os.path.join(workspace, "assets", "fonts"), exist_ok=True)
+    os.makedirs(os.path.join(workspace, "fixtures"), exist_ok=True)
+
+    # Font (captions need a real TrueType file)
+    font_src = font_path or os.path.join(REPO_ROOT, "assets", "fonts", "KomikaAxis.ttf")
+    font_dst = os.path.join(workspace, "assets", "fonts", "KomikaAxis.ttf")
+    if not os.path.exists(font_dst):
+        if not os.path.exists(font_src):
+            raise FileNotFoundError(f"Caption font not found ({font_src}). Pass --font PATH.")
+        shutil.copy(font_src, font_dst)
+
+    bg_len = max(lengths) + 30
+    if background == "noise":
+        # Worst case for the encoder: every pixel changes every frame
+        bg_source = ["-f", "lavfi", "-i", "color=c=gray:size=1920x1080:rate=30",
+                     "-vf", "noise=alls=60:allf=t+u"]
+    else:
+        bg_source = ["-f", "lavfi", "-i", "testsrc2=size=1920x1080:rate=30"]
+
+    bottom = os.path.join(workspace, "assets", "backgrounds", f"bench_{background}.mp4")
+    if not os.path.exists(bottom):
+        print(f"Generating background fixture ({background}, {bg_len}s)...")
+        _ffmpeg(*bg_source, "-t", str(bg_len), "-c:v", "libx264", "-preset", "ultrafast",
+                "-pix_fmt", "yuv420p", bottom)
+
+    top = os.path.join(workspace, "assets", "top_backgrounds", "bench_top.mp4")
+    if not os.path.exists(top):
+        # Short on purpose: exercises the loop path
+        _ffmpeg("-f", "lavfi", "-i", "testsrc=size=720x1280:rate=30", "-t", "20",
+                "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", top)
+
+    music = os.path.join(workspace, "assets", "music", "bench_bgm.mp3")
+    if not os.path.exists(music):
+        _ffmpeg("-f", "lavfi", "-i", "sine=frequency=330:duration=45", "-b:a", "128k", music)
+
+    rng = random.Random(1234)
+    for length in lengths:
+        narration = os.path.join(workspace, "fixtures", f"narration_{length}.mp3")
+        timings = os.path.join(workspace, "fixtures", f"narration_{length}.json")
+        if not os.path.exists(narration):
+            # Same format edge-tts produces (24kHz mono 48k MP3)
+            _ffmpeg("-f", "lavfi", "-i", f"sine=frequency=220:duration={length}",
+                    "-ac", "1", "-ar", "24000", "-b:a", "48k", narration)
+
+        word_dur = 1.0 / words_per_second
+        words = []
+        t = 0.0
+        while t + word_dur <= length:
+            words.append({"word": rng.choice(VOCABULARY), "start": round(t, 3),
+                          "end": round(t + word_dur * 0.9, 3)})
+            t += word_dur
+        with open(timings, "w", encoding="utf-8") as f:
+            json.dump(words, f)
+
+def _placeholder_downloader(query, output_dir, prefix):
+    from modules.image_downloader import generate_placeholder
+    return generate_placeholder(query, output_dir, prefix)
+
+def _fixture_music(mood, output_dir):
+    return os.path.join("assets", "music", "bench_bgm.mp3")
+
+# --- Measurement ---
+def peak_rss_mb():
+    """(self, children) peak resident set size in MB; children covers ffmpeg subprocesses."""
+    try:
+        import resource
+    except ImportError:
+        # Windows: no getrusage
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 1e6, None
+        except Exception:
+            return None, None
+    scale = 1e-6 if sys.platform == "darwin" else 1 / 1024 # bytes on macOS, KB on Linux
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+
+def run_render_case(case):
+    """Runs one create_video call in this process and returns its metrics."""
+    from modules.video_engine import VideoEngine
+    from modules.render_profiles import get_render_profile
+
+    length = case["length"]
+    audio = os.path.join("fixtures", f"narration_{length}.mp3")
+    sync = os.path.join("fixtures", f"narration_{length}.json")
+    script_data = {
+        "hook_mood": "Shock",
+        "visual_keywords": ["benchmark meme one", "benchmark meme two", "benchmark meme three",
+                            "benchmark meme four", "benchmark meme five"],
+    }
+
+    random.seed(case.get("seed", 0))
+    engine = VideoEngine(image_downloader=_placeholder_downloader, music_provider=_fixture_music)
+
+    start = time.perf_counter()
+    output = engine.create_video(audio, script_data, sync_path=sync, mode=case["mode"],
+                                 backend=case["backend"], profile=case["quality"],
+                                 chunk_workers=case.get("chunks"))
+    wall = time.perf_counter() - start
+
+    profile = get_render_profile(case["quality"])
+    frames = int(length * profile["fps"])
+    timings = dict(engine.last_timings)
+    render_time = wall - timings.get("plan", 0.0)
+    rss_self, rss_children = peak_rss_mb()
+
+    result = dict(case)
+    result.update({
+        "ok": bool(output and os.path.exists(output)),
+        "wall_s": round(wall, 3),
+        "render_s": round(render_time, 3),
+        "frames": frames,
+        "fps": round(frames / render_time, 2) if render_time > 0 else None,
+        "realtime_factor": round(length / wall, 3) if wall > 0 else None,
+        "phases_s": {k: round(v, 3) for k, v in timings.items()},
+        "peak_rss_mb": round(rss_self, 1) if rss_self else None,
+        "peak_rss_children_mb": round(rss_children, 1) if rss_children else None,
+        "output_bytes": os.path.getsize(output) if output and os.path.exists(output) else None,
+    })
+    if output and os.path.exists(output):
+        os.remove(output)
+    return result
+
+def run_subtitle_case(case):
+    """Caption card rendering (cold cache) and per-frame SubtitleTrack blend throughput."""
+    import numpy as np
+    import modules.caption_cache as caption_cache
+    from modules.caption_cache import CaptionCache
+    from modules.subtitle_renderer import SubtitleTrack, load_word_timings, render_caption_image
+    from config import FONT_PATH
+
+    caption_cache._default_cache = CaptionCache(disk_dir=None) # cold, memory only
+    timings = load_word_timings(os.path.join("fixtures", f"narration_{case['length']}.json"))
+
+    start = time.perf_counter()
+    for word, _, _ in timings:
+        render_caption_image(word, FONT_PATH)
+    card_time = time.perf_counter() - start
+
+    width, height, fps = 1080, 1920, 30
+    track = SubtitleTrack(timings, width, height, font_path=FONT_PATH, fps=fps)
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    n_frames = int(case["length"] * fps)
+    start = time.perf_counter()
+    for i in range(n_frames):
+        track.blend(frame, i / fps)
+    blend_time = time.perf_counter() - start
+    rss_self, _ = peak_rss_mb()
+
+    result = dict(case)
+    result.update({
+        "ok": True,
+        "words": len(timings),
+        "unique_words": len({w for w, _, _ in timings}),
+        "card_render_s": round(card_time, 3),
+        "cache": caption_cache._default_cache.stats(),
+        "blend_frames": n_frames,
+        "blend_fps": round(n_frames / blend_time, 1) if blend_time > 0 else None,
+        "peak_rss_mb": round(rss_self, 1) if rss_self else None,
+    })
+    return result
+
+def _run_case_subprocess(case, workspace):
+    """Fresh interpreter per case -> independent peak RSS and cold module caches."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("CAPTION_CACHE_DIR", "") # memory-only caption cache unless overridden
+    cmd = [sys.executable, "-m", "benchmarks.render_benchmark", "--run-case", json.dumps(case)]
+    proc = subprocess.run(cmd, cwd=workspace, env=env, capture_output=True, text=True)
+
+    # The case prints its JSON result as the last stdout line
+    for line in reversed(proc.stdout.strip().splitlines()):
+        if line.startswith("BENCH_RESULT "):
+            return json.loads(line[len("BENCH_RESULT "):])
+    result = dict(case)
+    result.update({"ok": False, "error": proc.stderr[-2000:]})
+    return result
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic render benchmark")
+    parser.add_argument("--suite", choices=["render", "subtitles", "all"], default="render")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[15, 60], help="Narration lengths (seconds)")
+    parser.add_argument("--modes", nargs="+", default=["classic", "brainrot"], choices=["classic", "brainrot"])
+    parser.add_argument("--backends", nargs="+", default=["moviepy", "ffmpeg"], choices=["moviepy", "ffmpeg"])
+    parser.add_argument("--quality", default="final", help="Render profile (draft/standard/final)")
+    parser.add_argument("--chunks", type=int, default=None, help="Chunked MoviePy rendering with N workers")
+    parser.add_argument("--words-per-second", type=float, default=2.7, help="Synthetic narration word rate")
+    parser.add_argument("--background", choices=["color", "noise"], default="color")
+    parser.add_argument("--normalize", action="store_true", help="Ingest the background library first")
+    parser.add_argument("--font", default=None, help="TrueType font for captions (default: repo font)")
+    parser.add_argument("--workspace", default=None, help="Fixture directory to create/reuse (default: temp dir)")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--run-case", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        case = json.loads(args.run_case)
+        sys.path.insert(0, REPO_ROOT)
+        from config import load_environment
+        load_environment() # FFmpeg on PATH, as main.py sets it up
+        runner = run_subtitle_case if case["suite"] == "subtitles" else run_render_case
+        print("BENCH_RESULT " + json.dumps(runner(case)))
+        return
+
+    workspace = os.path.abspath(args.workspace or tempfile.mkdtemp(prefix="render_bench_"))
+    output = os.path.abspath(args.output)
+    make_fixtures(workspace, args.lengths, args.words_per_second, args.background, args.font)
+
+    if args.normalize:
+        env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+        subprocess.run([sys.executable, "-m", "modules.background_library"], cwd=workspace, env=env, check=True)
+
+    cases = []
+    if args.suite in ("render", "all"):
+        for length in args.lengths:
+            for mode in args.modes:
+                for backend in args.backends:
+                    cases.append({"suite": "render", "length": length, "mode": mode, "backend": backend,
+                                  "quality": args.quality, "chunks": args.chunks, "seed": length})
+    if args.suite in ("subtitles", "all"):
+        for length in args.lengths:
+            cases.append({"suite": "subtitles", "length": length})
+
+    results = []
+    for case in cases:
+        label = " ".join(f"{k}={v}" for k, v in case.items() if v is not None and k != "seed")
+        print(f"[bench] {label} ...")
+        result = _run_case_subprocess(case, workspace)
+        results.append(result)
+        if not result["ok"]:
+            print(f"[bench]   FAILED: {result.get('error', 'no output')[-300:]}")
+        elif case["suite"] == "render":
+            print(f"[bench]   {result['fps']} fps | wall {result['wall_s']}s | "
+                  f"peak RSS {result['peak_rss_mb']} MB | phases {result['phases_s']}")
+        else:
+            print(f"[bench]   cards {result['card_render_s']}s ({result['unique_words']} unique) | "
+                  f"blend {result['blend_fps']} fps")
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "words_per_second": args.words_per_second,
+        "background": args.background,
+        "workspace": workspace,
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[bench] Results written to {output}")
+
+if __name__ == "__main__":
+    main()
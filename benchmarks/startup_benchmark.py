@@ -0,0 +1,92 @@
+"""
+Startup / import-time benchmark for the entry points.
+
+Runs each command several times in fresh interpreters and fails (exit 1) when the
+median wall time is over budget, so a heavy top-level import sneaking back in is
+caught. With --importtime it also prints the slowest modules (python -X importtime).
+
+Usage (from the repo root):
+    python -m benchmarks.startup_benchmark
+    python -m benchmarks.startup_benchmark --budget 0.5 --runs 7 --importtime
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, argv after the interpreter, budget multiplier). Imports mirror what each entry point
+# loads before doing work. The pipeline modules are only loaded by real runs, so they get 2x.
+COMMANDS = [
+    ("main.py --help", ["main.py", "--help"], 1),
+    ("import main", ["-c", "import main"], 1),
+    ("import pipeline modules", ["-c", "import modules.video_engine, modules.content_generator, modules.reddit_client"], 2),
+    ("import upload_scheduler", ["-c", "import upload_scheduler"], 1),
+]
+
+def time_command(argv, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable] + argv, cwd=REPO_ROOT,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        samples.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            return None, proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+    return samples, None
+
+def slowest_imports(argv, top_n=10):
+    """Top modules by cumulative import time (microseconds) for one run."""
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + argv, cwd=REPO_ROOT,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # Only top-level imports (no nesting indent): their cumulative times add up to the real cost
+        if name[1:].startswith(" "):
+            continue
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top_n]
+
+def main():
+    parser = argparse.ArgumentParser(description="Entry point startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=0.5, help="Max median seconds per command")
+    parser.add_argument("--importtime", action="store_true", help="Show the slowest imports per command")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    over_budget = False
+    for label, argv, multiplier in COMMANDS:
+        budget = args.budget * multiplier
+        samples, error = time_command(argv, args.runs)
+        if samples is None:
+            # e.g. optional uploader dependency not installed in this environment
+            print(f"{label:<28} skipped ({error})")
+            results.append({"command": label, "skipped": error})
+            continue
+        median = statistics.median(samples)
+        ok = median <= budget
+        over_budget = over_budget or not ok
+        print(f"{label:<28} median {median * 1000:7.1f} ms | min {min(samples) * 1000:7.1f} ms "
+              f"| {'ok' if ok else f'OVER BUDGET ({budget * 1000:.0f} ms)'}")
+        results.append({"command": label, "median_s": round(median, 4), "min_s": round(min(samples), 4),
+                        "budget_s": budget, "runs": args.runs, "ok": ok})
+        if args.importtime:
+            for cumulative_us, name in slowest_imports(argv):
+                print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+    sys.exit(1 if over_budget else 0)
+
+if __name__ == "__main__":
+    main()
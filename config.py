@@ -1,35 +1,96 @@
 import os
-from dotenv import load_dotenv
+from dotenv import dotenv_values
 from modules.subreddits import SUBREDDIT_LIST
 
-load_dotenv()
+# Importing config has no side effects (main.py --help stays cheap): .env is only read here, the real
+# environment wins over it. Entry points call load_environment() to put .env into os.environ and FFmpeg on PATH.
+_DOTENV = dotenv_values()
+
+def _getenv(name, default=None):
+    return os.environ.get(name, _DOTENV.get(name, default))
 
 # Reddit
 REDDIT_SUBREDDITS = SUBREDDIT_LIST
 REDDIT_TIMEFRAME = "day" # day, week, month, year, all
+# Listing fan-out: one concurrent fetch across REDDIT_SUBREDDITS fills the candidate pool for a whole batch
+REDDIT_FANOUT_CONCURRENCY = 4     # Listing requests in flight at once (RedditClient keeps 4 pooled connections)
+REDDIT_REQUESTS_PER_MINUTE = 100  # Fan-out start rate; Reddit's x-ratelimit-* headers can slow it further
+REDDIT_SORTS_PER_SUBREDDIT = 1    # Random sorts (top / controversial / best) fetched per subreddit
+
+# Candidate Pool (on disk): filtered posts per (subreddit, sort, timeframe), reused across retries and runs
+REDDIT_POOL_DB = _getenv("REDDIT_POOL_DB", "assets/cache/reddit_candidates.db")
+REDDIT_LISTING_TTL_S = int(_getenv("REDDIT_LISTING_TTL_S", "1800"))     # Don't re-fetch a listing sooner than this
+REDDIT_CANDIDATE_TTL_S = int(_getenv("REDDIT_CANDIDATE_TTL_S", "86400")) # Unused posts older than this are dropped
+REDDIT_POOL_LOW_WATER = int(_getenv("REDDIT_POOL_LOW_WATER", "20"))     # Refill in the background below this many unused
+
+# Candidate Scoring (cheap pre-screen before any LLM/TTS spend, see modules/candidate_scoring.py)
+TTS_WORDS_PER_MINUTE = 165        # Edge TTS narration speed at the default rate
+TARGET_STORY_SECONDS = (45, 150)  # Source stories reading this long aloud condense best into a 30-60s script
+CANDIDATE_MIN_SCORE = float(_getenv("CANDIDATE_MIN_SCORE", "0.45")) # Below this a post never reaches the LLM
+SUBREDDIT_PRIORS = {              # Score multipliers (lowercase names); unlisted subreddits count 1.0
+    "amitheasshole": 1.15, "tifu": 1.1, "maliciouscompliance": 1.1, "prorevenge": 1.1,
+    "pettyrevenge": 1.1, "entitledparents": 1.1, "bestofredditorupdates": 1.05,
+    # Long-form / meta write-ups that rarely condense into a short
+    "unresolvedmysteries": 0.85, "hobbydrama": 0.85, "subredditdrama": 0.8, "museumofreddit": 0.8,
+}
 
 # OpenAI / DeepSeek
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
+OPENAI_API_KEY = _getenv("OPENAI_API_KEY")
+DEEPSEEK_API_KEY = _getenv("DEEPSEEK_API_KEY")
 
 # Logic to switch between providers
 if DEEPSEEK_API_KEY:
     OPENAI_API_KEY = DEEPSEEK_API_KEY
-    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.deepseek.com")
-    AI_MODEL_NAME = os.getenv("AI_MODEL_NAME", "deepseek-chat")
+    OPENAI_BASE_URL = _getenv("OPENAI_BASE_URL", "https://api.deepseek.com")
+    AI_MODEL_NAME = _getenv("AI_MODEL_NAME", "deepseek-chat")
 else:
-    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
-    AI_MODEL_NAME = os.getenv("AI_MODEL_NAME", "gpt-4o")
+    OPENAI_BASE_URL = _getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    AI_MODEL_NAME = _getenv("AI_MODEL_NAME", "gpt-4o")
 
 # Instagram (Unofficial)
-IG_USERNAME = os.getenv("IG_USERNAME")
-IG_PASSWORD = os.getenv("IG_PASSWORD")
+IG_USERNAME = _getenv("IG_USERNAME")
+IG_PASSWORD = _getenv("IG_PASSWORD")
 
 # Video
 BACKGROUND_VIDEO_PATH = "assets/backgrounds"
 OUTPUT_VIDEO_PATH = "output"
 FONT_PATH = "assets/fonts/KomikaAxis.ttf" # Custom user font
 
+# Caption Cache (rendered word cards, shared across videos)
+CAPTION_CACHE_MAX_MB = int(_getenv("CAPTION_CACHE_MAX_MB", "64"))
+CAPTION_CACHE_DIR = _getenv("CAPTION_CACHE_DIR", "assets/cache/captions") or None # Empty -> memory only
+
+# Job Pipeline (main.py --count N): jobs per stage in flight, and how far stages may run ahead
+PIPELINE_CONCURRENCY = {
+    "fetch": 1,   # Serial so two jobs never race for the same post
+    "script": 2,
+    "audio": 2,
+    "assets": 2,
+    "render": 1,  # CPU bound; use --chunks / profiles for render parallelism
+    "sidecar": 1,
+}
+PIPELINE_QUEUE_SIZE = int(_getenv("PIPELINE_QUEUE_SIZE", "2"))
+
+# Shared Work Queue (SQLite): lets several main.py processes/hosts share posts and jobs without duplicates.
+# Put WORK_QUEUE_DB (and OUTPUT_VIDEO_PATH) on the shared filesystem; set WORK_QUEUE_WAL=0 on network shares.
+WORK_QUEUE_DB = _getenv("WORK_QUEUE_DB", "output/work_queue.db")
+WORK_QUEUE_LEASE_S = int(_getenv("WORK_QUEUE_LEASE_S", "120"))     # Job is up for grabs this long after its worker's last heartbeat
+WORK_QUEUE_HEARTBEAT_S = int(_getenv("WORK_QUEUE_HEARTBEAT_S", "20"))
+WORK_QUEUE_WAL = _getenv("WORK_QUEUE_WAL", "1") != "0"
+
+# Daemon Mode (main.py --daemon): keep output/finished_videos topped up instead of making a fixed --count
+DAEMON_BUFFER_DEPTH = int(_getenv("DAEMON_BUFFER_DEPTH", "6"))   # Videos waiting for upload + in production (all workers)
+DAEMON_POLL_S = int(_getenv("DAEMON_POLL_S", "30"))              # How often to re-check the buffer and disk while paused
+DAEMON_MIN_FREE_MB = int(_getenv("DAEMON_MIN_FREE_MB", "2048"))  # Pause while the output disk has less free space
+DAEMON_DRAIN_WINDOW_S = 6 * 3600                                    # Upload-rate estimate looks at this much history
+
+# TTS Concurrency (segments synthesized in parallel per multi-voice script)
+TTS_CONCURRENCY = max(1, int(_getenv("TTS_CONCURRENCY", "6")))
+
+# TTS Cache (synthesized segments + word boundaries, keyed by text/voice/settings)
+TTS_CACHE_MAX_MB = int(_getenv("TTS_CACHE_MAX_MB", "256"))
+TTS_CACHE_DIR = _getenv("TTS_CACHE_DIR", "assets/cache/tts") or None # Empty -> disabled
+
 # TTS Voices (EdgeTTS)
 TTS_VOICES = [
     "en-US-AriaNeural",       # Female (US)
@@ -41,9 +102,15 @@ TTS_VOICES = [
 ]
 
 
-# Add FFmpeg to PATH for current session
+# FFmpeg location added to PATH by load_environment()
 ffmpeg_path = r"C:\Users\HP\AppData\Local\Microsoft\WinGet\Links"
-os.environ["PATH"] += os.pathsep + ffmpeg_path
+
+def load_environment():
+    """Process setup for entry points: .env into os.environ (libraries, child processes) and FFmpeg on PATH."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    if ffmpeg_path not in os.environ["PATH"]:
+        os.environ["PATH"] += os.pathsep + ffmpeg_path
 
 # --- Persistent Device Identity ---
 import uuid
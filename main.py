@@ -1,139 +1,462 @@
 import asyncio
 import argparse
-import random
 import os
 import json
+import time
+import glob
+import shutil
+import collections
+import itertools
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from config import *
-from modules.reddit_client import RedditClient
-from modules.content_generator import ContentGenerator
-from modules.video_engine import VideoEngine
 from modules.post_history import PostHistory
+from modules.render_profiles import RENDER_PROFILES
+from modules.pipeline import Stage, run_pipeline
+from modules.job_journal import JobJournal
+from modules.work_queue import WorkQueue
+from modules.candidate_pool import CandidatePool
+from modules.candidate_scoring import score_post
+from modules.tracing import span, job_context, enable_tracing, export_chrome_trace
+from modules.profiling import run_profiled, profile_span, enable_profiling, print_profile_summary
 # from modules.instagram_client import InstagramClient
 
-async def run_one_cycle(reddit, content_gen, video_engine, history, index, total, mode="classic", fast_mode=False):
-    print(f"\n--- [Batch {index}/{total}] Starting Cycle ---")
-    
-    # 2. Get Content
-    # 2. Get Content (Aggressive Retry)
-    max_retries = 10
+# --- Job Stages ---
+# Each stage takes the job dict, fills in its part and returns it (None = job failed).
+# Blocking work runs in a thread so the pipeline keeps other stages moving.
+
+def blocking(job, stage, func, *args, **kwargs):
+    """Runs a blocking step in a thread (profiled per job/stage with --profile)."""
+    return asyncio.to_thread(run_profiled, job["id"], stage, func, *args, **kwargs)
+
+def sampled(stage, func):
+    """Async stage (work on the event loop, e.g. TTS) profiled by sampling the loop thread with --profile."""
+    async def run(ctx, job):
+        with profile_span(job["id"], stage):
+            return await func(ctx, job)
+    return run
+
+def log_refill_failure(task):
+    """Done-callback: background refills nobody awaits would otherwise fail silently."""
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Candidate pool refill failed: {task.exception()!r}")
+
+def refill_candidates(ctx):
+    """Starts the candidate pool refill fan-out, or returns the one already running (one per process)."""
+    task = ctx.get("refill_task")
+    if task is None or task.done():
+        task = ctx["refill_task"] = asyncio.create_task(ctx["reddit"].refill_pool(
+            ctx["candidate_pool"], time_filter=REDDIT_TIMEFRAME, limit=75, sorts_per_subreddit=REDDIT_SORTS_PER_SUBREDDIT,
+            concurrency=REDDIT_FANOUT_CONCURRENCY, requests_per_minute=REDDIT_REQUESTS_PER_MINUTE))
+        task.add_done_callback(log_refill_failure)
+    return task
+
+async def fetch_stage(ctx, job):
+    """
+    Claims the best-scoring unseen post from the on-disk candidate pool (claim is atomic across every
+    worker sharing the queue). Posts that fail the pre-screen never get here, so no LLM/TTS is spent on them.
+    Reddit is only asked when the pool runs dry (wait for the refill) or low (refill in the background).
+    """
+    history, queue, pool = ctx["history"], ctx["queue"], ctx["candidate_pool"]
+    max_rounds = 3
     post = None
     
-    for attempt in range(max_retries):
-        sort_strategy = random.choice(["top", "controversial", "best"])
-        print(f"Fetching Reddit posts (Attempt {attempt+1}/{max_retries} | Sort: {sort_strategy})...")
-        
-        # RedditClient now handles random sub selection if we don't pass one, 
-        # BUT we want to force a re-roll if it failed.
-        # Since main.py passed `subreddits=list` to init, `get_top_posts()` picks one internally if None passed.
-        candidates = reddit.get_top_posts(time_filter=REDDIT_TIMEFRAME, limit=75, sort=sort_strategy)
-        
-        for candidate in candidates:
-            if not history.is_seen(candidate['id']):
-                post = candidate
+    for round_no in range(max_rounds + 1):
+        while post is None:
+            candidate = await asyncio.to_thread(pool.take)
+            if candidate is None:
                 break
-        
-        if post:
-            print(f"Found suitable post: {post['title']}")
+            if not history.is_seen(candidate['id']) and await asyncio.to_thread(queue.claim_post, candidate['id'], job['id']):
+                post = candidate
+        if post or round_no == max_rounds:
             break
-        else:
-            print("No suitable posts in this sub/batch. Retrying...")
+        rejected = await asyncio.to_thread(pool.rejected)
+        print(f"[Video {job['index']}] Candidate pool is dry ({rejected} screened out). "
+              f"Fetching stale listings (Round {round_no+1}/{max_rounds})...")
+        try:
+            await refill_candidates(ctx)
+        except Exception:
+            pass # Logged by log_refill_failure; the next round starts a fresh refill
             
     if not post:
         print("CRITICAL: No new suitable posts found after multiple retries.")
-        return False
+        return None
         
-    print(f"Found post: {post['title']}")
-    history.add_post(post) 
+    left = await asyncio.to_thread(pool.available)
+    screening = post.get("screening", {})
+    print(f"Found post: {post['title']} (r/{post['subreddit']} | score {screening.get('score')} | "
+          f"~{screening.get('spoken_s')}s aloud | {left} unused candidates in pool)")
+    if screening.get("reasons"):
+        print(f"  Screening notes: {', '.join(screening['reasons'])}")
+    if left < REDDIT_POOL_LOW_WATER:
+        refill_candidates(ctx) # Top up while this job moves on
+    history.add_post(post)
+    job["post"] = post
+    return job
 
-    # 3. Generate Script
-    print("Generating script from LLM...")
-    script_data = content_gen.generate_script(post)
+async def script_stage(ctx, job):
+    print(f"[Video {job['index']}] Generating script from LLM...")
+    script_data = await blocking(job, "script", ctx["content_gen"].generate_script, job["post"])
     if not script_data:
         print("Failed to generate script.")
-        return False
+        return None
         
     print(f"Script generated. Title: {script_data['title_overlay']}")
-    
-    # 4. Audio
+    job["script_data"] = script_data
+    return job
+
+async def audio_stage(ctx, job):
+    script_data = job["script_data"]
     # Use a unique temp filename for audio to avoid collisions if running parallel (future proofing)
-    temp_audio_name = f"temp_audio_{index}.mp3"
+    temp_audio_name = f"temp_audio_{job['id']}.mp3"
     audio_path = os.path.join(OUTPUT_VIDEO_PATH, temp_audio_name)
     
     # Determine Input Source (Segments > Text)
     script_segments = script_data.get('script_segments')
-    if script_segments and fast_mode:
+    if script_segments and ctx["args"].fast:
         print("[DEBUG] Fast Mode: Truncating script to 3 segments for rapid testing.")
         script_segments = script_segments[:3]
         
     script_input = script_segments if script_segments else script_data.get('script_text')
     
     input_len = len(str(script_input)) # Approx length for logging
-    print(f"Generating audio (Input Len: {input_len})...")
+    print(f"[Video {job['index']}] Generating audio (Input Len: {input_len})...")
     # Pass script_data (which includes 'used_subreddit') as context
-    result = await content_gen.generate_audio(script_input, audio_path, context_data=script_data)
+    result = await ctx["content_gen"].generate_audio(script_input, audio_path, context_data=script_data)
     
     if not result:
         print("Failed to generate audio.")
-        return False
+        return None
         
     # Audio + Metadata (JSON) are now returned
-    audio_path, sync_path = result
+    job["audio_path"], job["sync_path"] = result
+    return job
+
+async def assets_stage(ctx, job):
+    """Downloads memes/BGM and picks backgrounds (everything the renderer needs)."""
+    args = ctx["args"]
+    print(f"[Video {job['index']}] Planning video (Mode: {args.mode} | Profile: {args.quality})...")
+    job["plan"] = await blocking(job, "assets", ctx["video_engine"].plan_video, job["audio_path"], job["script_data"],
+                                 sync_path=job["sync_path"], mode=args.mode, profile=args.quality)
+    return job
+
+async def render_stage(ctx, job):
+    args = ctx["args"]
+    pool = ctx.get("render_pool")
+    if pool:
+        # Ship the finished job spec (plan = audio, timings, assets, backgrounds) to a render process
+        from modules.video_engine import render_job
+        print(f"[Video {job['index']}] Rendering ({args.backend}) in worker pool...")
+        loop = asyncio.get_running_loop()
+        job["video_path"], job["render_timings"] = await loop.run_in_executor(
+            pool, render_job, job["plan"], OUTPUT_VIDEO_PATH, args.backend, ctx["render_threads"], job["id"])
+        return job
+
+    print(f"[Video {job['index']}] Rendering ({args.backend})...")
+    job["video_path"] = await blocking(job, "render", ctx["video_engine"].render_plan, job["plan"],
+                                       backend=args.backend, chunk_workers=args.chunks, job_id=job["id"])
+    return job
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+async def sidecar_stage(ctx, job):
+    """Save Metadata Sidecar for Scheduler"""
+    post, script_data, final_video_path = job["post"], job["script_data"], job["video_path"]
+    base_name = os.path.splitext(final_video_path)[0]
+    json_sidecar_path = f"{base_name}.json"
+    
+    meta_data = {
+        "id": post['id'],
+        "title": script_data.get('title', 'Reddit Story'),
+        "caption": script_data.get('caption', f"{post['title']} #reddit"),
+        "author": post['author'],
+        "subreddit": post['subreddit'],
+        "video_path": final_video_path
+    }
     
-    # 5. Create Video
+    await blocking(job, "sidecar", write_json, json_sidecar_path, meta_data)
+        
+    print(f"\nSUCCESS! Video created at: {final_video_path}")
+    print(f"Metadata saved to: {json_sidecar_path}")
+    return job
+
+JOB_STAGES = [
+    ("fetch", sampled("fetch", fetch_stage)),
+    ("script", script_stage),
+    ("audio", sampled("audio", audio_stage)),
+    ("assets", assets_stage),
+    ("render", render_stage),
+    ("sidecar", sidecar_stage),
+]
+
+def new_job(index):
+    # Unique across runs/processes: also names the job's temp audio and journal entry
+    return {"id": f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{index}", "index": index,
+            "created_at": time.time(), "completed": []}
+
+async def run_job_stage(ctx, name, func, job):
+    """
+    Runs one stage and checkpoints it in the journal and the work queue.
+    Stages completed in an earlier run are skipped.
+    """
+    journal, queue = ctx["journal"], ctx["queue"]
+    if name in job.get("completed", []):
+        return job
     try:
-        final_video_path = video_engine.create_video(audio_path, script_data, sync_path=sync_path, mode=mode)
-        if final_video_path:
-            # Save Metadata Sidecar for Scheduler
-            base_name = os.path.splitext(final_video_path)[0]
-            json_sidecar_path = f"{base_name}.json"
-            
-            meta_data = {
-                "id": post['id'],
-                "title": script_data.get('title', 'Reddit Story'),
-                "caption": script_data.get('caption', f"{post['title']} #reddit"),
-                "author": post['author'],
-                "subreddit": post['subreddit'],
-                "video_path": final_video_path
-            }
-            
-            with open(json_sidecar_path, 'w', encoding='utf-8') as f:
-                json.dump(meta_data, f, indent=2, ensure_ascii=False)
-                
-            print(f"\nSUCCESS! Video created at: {final_video_path}")
-            print(f"Metadata saved to: {json_sidecar_path}")
-            return True
+        with job_context(job["id"]), span(f"stage.{name}", index=job["index"]):
+            result = await func(ctx, job)
     except Exception as e:
-        print(f"Video generation failed: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+        await asyncio.to_thread(journal.mark_failed, job, name, e)
+        await asyncio.to_thread(queue.finish, job["id"], "failed")
+        raise
+    if result is None:
+        await asyncio.to_thread(journal.mark_failed, job, name, "stage returned no result")
+        await asyncio.to_thread(queue.finish, job["id"], "failed")
+        return None
+    # In threads: the journal fsyncs and the queue can wait out SQLite's busy timeout behind
+    # other workers; on the loop that would stall every stage and the lease heartbeat
+    await asyncio.to_thread(journal.checkpoint, result, name)
+    if name == JOB_STAGES[-1][0]:
+        await asyncio.to_thread(queue.finish, job["id"], "done")
+    else:
+        await asyncio.to_thread(queue.checkpoint, job["id"], name)
+    return result
+
+async def heartbeat_loop(queue):
+    """Keeps this worker's job leases alive while it runs (a dead worker's jobs expire and can be resumed)."""
+    while True:
+        await asyncio.sleep(WORK_QUEUE_HEARTBEAT_S)
+        try:
+            await asyncio.to_thread(queue.heartbeat)
+        except Exception as e:
+            print(f"Work queue heartbeat failed: {e}")
+
+async def run_one_cycle(ctx, job, total):
+    """One video, stage after stage (--sequential)."""
+    print(f"\n--- [Batch {job['index']}/{total}] Starting Cycle ---")
+    for name, func in JOB_STAGES:
+        try:
+            job = await run_job_stage(ctx, name, func, job)
+        except Exception as e:
+            print(f"Stage '{name}' failed: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+        if job is None:
+            return False
+    return True
+
+async def run_pipelined(ctx, jobs, on_complete=None):
+    """All videos at once: network stages work ahead while earlier videos render."""
+    workers = ctx["args"].workers
+    stages = []
+    for name, func in JOB_STAGES:
+        async def run(job, name=name, func=func):
+            return await run_job_stage(ctx, name, func, job)
+        concurrency = workers if (name == "render" and workers > 1) else PIPELINE_CONCURRENCY.get(name, 1)
+        stages.append(Stage(name, run, concurrency))
+
+    # Keep enough planned jobs queued that no render worker waits on the network stages
+    queue_size = max(PIPELINE_QUEUE_SIZE, workers)
+    limits = ", ".join(f"{s.name}={s.concurrency}" for s in stages)
+    print(f"Pipeline: {limits} | queue depth {queue_size}")
+    completed, _ = await run_pipeline(jobs, stages, queue_size=queue_size, on_complete=on_complete)
+    return len(completed)
+
+# --- Daemon Mode ---
+# One long-running, warm process (imports, fonts, caption cache, background manifest, render pool)
+# that keeps the upload buffer at DAEMON_BUFFER_DEPTH instead of making a fixed --count.
+# The uploader sets the pace: a new job only starts once an upload (or a failed job) makes room.
+
+def buffered_videos(directory):
+    """Finished videos waiting for upload (same rule as upload_scheduler: an .mp4 with its .json sidecar)."""
+    bases = (os.path.splitext(path)[0] for path in glob.glob(os.path.join(directory, "*.mp4")))
+    return {base for base in bases if os.path.exists(base + ".json")}
+
+class BufferWatch:
+    """Polls the finished-video directory and estimates how fast the uploader drains it."""
+    def __init__(self, directory, window_s=DAEMON_DRAIN_WINDOW_S):
+        self.directory = directory
+        self.window_s = window_s
+        self.videos = buffered_videos(directory)
+        self.drained_at = collections.deque()
+        self.started_at = time.time()
+
+    def poll(self):
+        """Returns the current buffer depth."""
+        now = time.time()
+        current = buffered_videos(self.directory)
+        self.drained_at.extend([now] * len(self.videos - current))
+        self.videos = current
+        while self.drained_at and self.drained_at[0] < now - self.window_s:
+            self.drained_at.popleft()
+        return len(current)
+
+    def uploads_per_hour(self):
+        observed_s = min(self.window_s, max(time.time() - self.started_at, 1))
+        return len(self.drained_at) * 3600 / observed_s
+
+async def daemon_jobs(ctx, first_jobs):
+    """
+    Endless job source for run_pipeline (--daemon). Yields resumed jobs first, then a new job
+    whenever ready + in-production videos (all workers sharing the queue) are below the target
+    depth and the output disk has room. Backs off for a poll interval after a job fails.
+    """
+    queue = ctx["queue"]
+    watch = BufferWatch(ctx["video_engine"].output_path)
+    for job in first_jobs:
+        yield job
+
+    index = len(first_jobs)
+    last_status = None
+    failed_seen = None
+    while True:
+        depth = await asyncio.to_thread(watch.poll)
+        stats = await asyncio.to_thread(queue.stats)
+        in_flight = stats["running"]
+        free_mb = shutil.disk_usage(OUTPUT_VIDEO_PATH).free / (1024 * 1024)
+
+        status = None
+        if failed_seen is not None and stats["failed"] > failed_seen:
+            status = "a job failed, backing off"
+        elif free_mb < DAEMON_MIN_FREE_MB:
+            status = f"paused: {free_mb:.0f} MB free on the output disk (minimum {DAEMON_MIN_FREE_MB} MB)"
+        elif depth + in_flight >= DAEMON_BUFFER_DEPTH:
+            status = f"buffer full: {depth} ready + {in_flight} in production (target {DAEMON_BUFFER_DEPTH})"
+        failed_seen = stats["failed"]
+
+        if status:
+            if status != last_status:
+                print(f"[Daemon] {status} | uploads {watch.uploads_per_hour():.1f}/h. Re-checking every {DAEMON_POLL_S}s.")
+                last_status = status
+            await asyncio.sleep(DAEMON_POLL_S)
+            continue
+
+        last_status = None
+        index += 1
+        job = new_job(index)
+        await asyncio.to_thread(queue.add_job, job["id"])
+        print(f"[Daemon] {depth} ready + {in_flight} in production (target {DAEMON_BUFFER_DEPTH}): starting video {index}")
+        yield job
 
 async def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--count", type=int, default=1, help="Number of videos to generate")
     parser.add_argument("--mode", type=str, default="classic", choices=["classic", "brainrot"], help="Video Style: 'classic' (Fullscreen Gameplay) or 'brainrot' (Split Screen)")
+    parser.add_argument("--backend", type=str, default="moviepy", choices=["moviepy", "ffmpeg"], help="Renderer: 'moviepy' (Python compositing) or 'ffmpeg' (single native filtergraph)")
+    parser.add_argument("--chunks", type=int, default=None, help="MoviePy backend: render the timeline in N parallel chunks and concat them")
+    parser.add_argument("--quality", type=str, default="final", choices=list(RENDER_PROFILES), help="Render profile: 'draft' (540p/15fps/ultrafast, no BGM) for review, 'final' for publishing")
+    parser.add_argument("--workers", type=int, default=1, help="Render N videos at once in separate processes (each gets cores/N encoder threads)")
+    parser.add_argument("--sequential", action="store_true", help="Make one video at a time instead of pipelining stages across videos")
+    parser.add_argument("--daemon", action="store_true", help=f"Run until stopped, keeping output/finished_videos topped up to DAEMON_BUFFER_DEPTH ({DAEMON_BUFFER_DEPTH}) videos; --count is ignored")
+    parser.add_argument("--resume", action="store_true", help="First finish interrupted/failed jobs from output/jobs, restarting each at its last completed stage")
+    parser.add_argument("--trace", type=str, default=None, metavar="FILE", help="Record timing spans to FILE (JSONL) and FILE minus .jsonl + .trace.json (Chrome trace)")
+    parser.add_argument("--profile", type=str, nargs="?", const="output/profiles", default=None, metavar="DIR", help="Profile every stage (cProfile .pstats + sampled .collapsed stacks per job) into DIR and print the hottest functions")
     parser.add_argument("--fast", action="store_true", help="Debug Mode: Generate a very short video")
     args = parser.parse_args()
+    if args.daemon and args.sequential:
+        parser.error("--daemon streams jobs through the pipeline; it can't be combined with --sequential")
+    
+    load_environment() # .env into os.environ, FFmpeg on PATH (render processes inherit both)
+    if args.trace:
+        # Before any worker process starts: they inherit the trace file through the environment
+        enable_tracing(args.trace)
+    if args.profile:
+        enable_profiling(args.profile)
     
-    print(f"--- AI Instagram Bot Starting (Target: {args.count} videos | Mode: {args.mode}) ---")
+    target = f"buffer of {DAEMON_BUFFER_DEPTH} videos (daemon)" if args.daemon else f"{args.count} videos"
+    print(f"--- AI Instagram Bot Starting (Target: {target} | Mode: {args.mode} | Backend: {args.backend} | Quality: {args.quality}) ---")
     
     # 1. Initialize Modules
+    # Imported here, not at the top: --help and argument errors shouldn't pay for requests/PIL/numpy
+    from modules.reddit_client import RedditClient
+    from modules.content_generator import ContentGenerator
+    from modules.video_engine import VideoEngine
     reddit = RedditClient(subreddits=REDDIT_SUBREDDITS)
     content_gen = ContentGenerator()
     video_engine = VideoEngine()
     history = PostHistory()
+    queue = WorkQueue(WORK_QUEUE_DB, lease_seconds=WORK_QUEUE_LEASE_S, wal=WORK_QUEUE_WAL)
     
-    successful = 0
-    for i in range(1, args.count + 1):
-        if await run_one_cycle(reddit, content_gen, video_engine, history, i, args.count, mode=args.mode, fast_mode=args.fast):
-            successful += 1
-        
-        # Small delay between batches to be nice to APIs?
-        if i < args.count:
-            print("Waiting 5 seconds before next batch...")
-            await asyncio.sleep(5)
+    ctx = {
+        "args": args,
+        "reddit": reddit,
+        "content_gen": content_gen,
+        "video_engine": video_engine,
+        "history": history,
+        "journal": JobJournal(),
+        "queue": queue,
+        "candidate_pool": CandidatePool(
+            REDDIT_POOL_DB, listing_ttl=REDDIT_LISTING_TTL_S, candidate_ttl=REDDIT_CANDIDATE_TTL_S,
+            scorer=functools.partial(score_post, target_range=TARGET_STORY_SECONDS,
+                                     words_per_minute=TTS_WORDS_PER_MINUTE, priors=SUBREDDIT_PRIORS),
+            min_score=CANDIDATE_MIN_SCORE),
+    }
+    
+    # Unfinished jobs from earlier runs first (they count towards --count), then new ones.
+    # Only jobs nobody else holds a live lease on: other workers may be resuming/running them right now.
+    jobs = []
+    if args.resume:
+        for job in ctx["journal"].unfinished():
+            if not queue.claim_job(job["id"]):
+                continue
+            if job.get("post"):
+                queue.claim_post(job["post"]["id"], job["id"]) # Journal entries from before the queue existed
+            print(f"Resuming job {job['id']} after stages: {', '.join(job['completed']) or 'none'}")
+            jobs.append(job)
+    new_jobs = [] if args.daemon else [new_job(i) for i in range(len(jobs) + 1, args.count + 1)]
+    for job in new_jobs:
+        queue.add_job(job["id"])
+    jobs += new_jobs
+    total = len(jobs)
+    print(f"Work queue: worker {queue.worker_id} | {WORK_QUEUE_DB} | {queue.stats()}")
+    heartbeat = asyncio.create_task(heartbeat_loop(queue))
+    source, on_complete = jobs, None
+    if args.daemon:
+        # Stays up: new jobs come from the buffer watch; finished ones aren't kept in memory
+        source = daemon_jobs(ctx, jobs)
+        made = itertools.count(1)
+        on_complete = lambda job: print(f"[Daemon] Video ready ({next(made)} made since start): {job['video_path']}")
+    
+    try:
+        if args.sequential:
+            successful = 0
+            for i, job in enumerate(jobs, 1):
+                if await run_one_cycle(ctx, job, total):
+                    successful += 1
             
-    print(f"\n--- Batch Finished. {successful}/{args.count} videos created. ---")
+                # Small delay between batches to be nice to APIs?
+                if i < total:
+                    print("Waiting 5 seconds before next batch...")
+                    await asyncio.sleep(5)
+        elif args.workers > 1:
+            # Render processes, each with an equal share of the cores for its encoder
+            ctx["render_threads"] = max(1, (os.cpu_count() or 1) // args.workers)
+            if args.chunks:
+                print("Note: --chunks is ignored with --workers (parallelism comes from the worker pool).")
+            print(f"Render pool: {args.workers} workers x {ctx['render_threads']} encoder threads")
+            # spawn, not fork: the coordinator already runs stage threads
+            with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                ctx["render_pool"] = pool
+                successful = await run_pipelined(ctx, source, on_complete)
+        else:
+            successful = await run_pipelined(ctx, source, on_complete)
+    finally:
+        heartbeat.cancel()
+        queue.release() # Interrupted jobs can be resumed by any worker right away
+            
+    print(f"\n--- Batch Finished. {successful}/{total} videos created. ---")
+    print(f"Reddit: {reddit.stats['requests']} requests ({reddit.stats['not_modified']} not modified), "
+          f"{reddit.stats['bytes'] / 1024:.0f} KiB downloaded, {reddit.stats['retries']} retries")
+    
+    if args.trace:
+        chrome_path = export_chrome_trace(args.trace, os.path.splitext(args.trace)[0] + ".trace.json")
+        print(f"Trace: {args.trace} (spans) | {chrome_path} (open in chrome://tracing or ui.perfetto.dev)")
+    if args.profile:
+        print_profile_summary(args.profile)
 
 if __name__ == "__main__":
     if os.name == "nt":
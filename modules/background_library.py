@@ -0,0 +1,262 @@
+import bisect
+import hashlib
+import json
+import os
+import random
+import subprocess
+from modules.media_probe import probe_media, probe_keyframes
+
+# Normalized Variants: every gameplay/satisfying clip is transcoded once per target geometry
+# (cover-cropped, fixed fps, short GOP) so renders never resize/crop and seeks are cheap.
+NORMALIZED_DIR = "assets/normalized"
+MANIFEST_FILE = "manifest.json"
+LIBRARY_DIRS = ["assets/backgrounds", "assets/top_backgrounds"]
+TARGET_GEOMETRIES = [(1080, 1920), (1080, 960)]
+TARGET_FPS = 30
+GOP_SECONDS = 1 # Keyframe every second -> worst case 1s of decode on seek
+VIDEO_EXTENSIONS = ('.mp4', '.mov')
+
+def _variant_key(width, height):
+    return f"{width}x{height}"
+
+def source_hash(path, chunk_size=1024 * 1024):
+    """
+    Cheap content hash: file size + first and last MB.
+    Full hashes of multi-GB gameplay files would cost more than the transcode check saves.
+    """
+    size = os.path.getsize(path)
+    h = hashlib.sha1(str(size).encode())
+    with open(path, "rb") as f:
+        h.update(f.read(chunk_size))
+        if size > chunk_size:
+            f.seek(max(size - chunk_size, chunk_size))
+            h.update(f.read(chunk_size))
+    return h.hexdigest()
+
+def probe_clip(path):
+    """Duration, resolution, fps, codec and keyframe timestamps for the manifest."""
+    info = probe_media(path)
+    try:
+        info["keyframes"] = probe_keyframes(path)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"  Keyframe probe failed for {path} ({e}). Seeks will not be snapped.")
+        info["keyframes"] = []
+    return info
+
+class BackgroundLibrary:
+    def __init__(self, normalized_dir=NORMALIZED_DIR):
+        self.normalized_dir = normalized_dir
+        self.manifest_path = os.path.join(normalized_dir, MANIFEST_FILE)
+        self._manifest = None
+        self._manifest_mtime = None
+        self._info_index = {}
+
+    # --- Manifest ---
+    @property
+    def manifest(self):
+        """Source path -> entry. Reloaded when another process rewrites the file."""
+        mtime = os.path.getmtime(self.manifest_path) if os.path.exists(self.manifest_path) else None
+        if self._manifest is None or mtime != self._manifest_mtime:
+            self._manifest = {}
+            if mtime is not None:
+                try:
+                    with open(self.manifest_path, "r", encoding="utf-8") as f:
+                        self._manifest = json.load(f).get("sources", {})
+                except (OSError, ValueError) as e:
+                    print(f"Background manifest unreadable ({e}). Treating library as not ingested.")
+            self._manifest_mtime = mtime
+            self._rebuild_index()
+        return self._manifest
+
+    def _rebuild_index(self):
+        """Any playable path (raw source or variant) -> its probe info."""
+        self._info_index = {}
+        for src, entry in self._manifest.items():
+            if entry.get("probe"):
+                self._info_index[src] = entry["probe"]
+            for variant in entry.get("variants", {}).values():
+                if variant.get("probe"):
+                    self._info_index[os.path.normpath(variant["path"])] = variant["probe"]
+
+    def save_manifest(self):
+        os.makedirs(self.normalized_dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"sources": self._manifest}, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest_mtime = os.path.getmtime(self.manifest_path)
+        self._rebuild_index()
+
+    def _entry_is_fresh(self, path, entry):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return entry.get("mtime") == stat.st_mtime and entry.get("size") == stat.st_size
+
+    # --- Lookup (render time) ---
+    def resolve(self, path, width, height):
+        """
+        Returns the normalized variant for a source clip at the given geometry,
+        or None if the source was not ingested (or changed since).
+        """
+        entry = self.manifest.get(os.path.normpath(path))
+        if not entry or not self._entry_is_fresh(path, entry):
+            return None
+        variant = entry.get("variants", {}).get(_variant_key(width, height))
+        if variant and os.path.exists(variant["path"]):
+            return variant["path"]
+        return None
+
+    def sources(self, library_dir):
+        """Manifest-listed clips of one library directory (no directory listing per render)."""
+        library_dir = os.path.normpath(library_dir)
+        return [src for src in self.manifest if os.path.dirname(src) == library_dir]
+
+    def media_info(self, path):
+        """Persisted probe info (duration, size, fps, codec, keyframes) or None if never scanned."""
+        self.manifest # reload if another process rewrote it
+        return self._info_index.get(os.path.normpath(path))
+
+    def pick_start(self, path, target_duration):
+        """
+        Random segment start for a clip, snapped back to the nearest keyframe so
+        opening the segment decodes nothing before the first frame we use.
+        Returns (start, clip_duration); start is 0 when the clip needs looping.
+        """
+        info = self.media_info(path)
+        if info is None:
+            return None
+        clip_duration = info["duration"]
+        if clip_duration <= target_duration:
+            return 0.0, clip_duration
+
+        start_t = random.uniform(0, clip_duration - target_duration)
+        keyframes = info.get("keyframes") or []
+        i = bisect.bisect_right(keyframes, start_t) - 1
+        if i >= 0:
+            start_t = keyframes[i]
+        return start_t, clip_duration
+
+    # --- Scan / Ingest (offline) ---
+    def _refresh_source(self, src, force=False):
+        """Creates or refreshes the manifest entry (hash + probe) for one raw source."""
+        stat = os.stat(src)
+        entry = self.manifest.get(src)
+
+        if entry is None or force or not self._entry_is_fresh(src, entry):
+            # New or modified source: re-hash and re-probe, old variants no longer apply
+            entry = {"hash": source_hash(src), "mtime": stat.st_mtime,
+                     "size": stat.st_size, "variants": {}}
+            self._manifest[src] = entry
+
+        if "probe" not in entry:
+            print(f"Probing {os.path.basename(src)}...")
+            try:
+                entry["probe"] = probe_clip(src)
+            except (OSError, subprocess.CalledProcessError, ValueError) as e:
+                # Recorded as None so we don't re-probe a bad file on every scan
+                print(f"  Probe failed for {src} ({e}).")
+                entry["probe"] = None
+        return entry
+
+    def scan(self, library_dirs=LIBRARY_DIRS):
+        """
+        Probes new/changed raw sources and drops deleted ones. No transcoding.
+        Cheap when nothing changed (one listdir per library, no ffprobe).
+        """
+        manifest = self.manifest
+        seen = set()
+        changed = False
+
+        for library_dir in library_dirs:
+            if not os.path.exists(library_dir):
+                continue
+            for name in sorted(os.listdir(library_dir)):
+                if not name.endswith(VIDEO_EXTENSIONS):
+                    continue
+                src = os.path.normpath(os.path.join(library_dir, name))
+                seen.add(src)
+                entry = manifest.get(src)
+                if entry is None or "probe" not in entry or not self._entry_is_fresh(src, entry):
+                    self._refresh_source(src)
+                    changed = True
+
+        scanned_dirs = {os.path.normpath(d) for d in library_dirs}
+        for src in list(manifest):
+            if os.path.dirname(src) in scanned_dirs and src not in seen:
+                del manifest[src]
+                changed = True
+
+        if changed:
+            self.save_manifest()
+        return manifest
+
+    def _transcode(self, src, dst, width, height):
+        tmp_dst = dst + ".part.mp4"
+        cmd = [
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", src,
+            "-vf", f"fps={TARGET_FPS},scale={width}:{height}:force_original_aspect_ratio=increase,"
+                   f"crop={width}:{height},setsar=1",
+            "-an",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-pix_fmt", "yuv420p",
+            # Fixed short GOP, no scene-cut keyframes -> predictable seek points
+            "-g", str(TARGET_FPS * GOP_SECONDS), "-keyint_min", str(TARGET_FPS * GOP_SECONDS),
+            "-sc_threshold", "0",
+            "-movflags", "+faststart",
+            tmp_dst
+        ]
+        subprocess.run(cmd, check=True)
+        os.replace(tmp_dst, dst)
+
+    def ingest(self, library_dirs=LIBRARY_DIRS, geometries=TARGET_GEOMETRIES, force=False):
+        """Transcodes every new or changed source into all target geometries."""
+        manifest = self.manifest
+        os.makedirs(self.normalized_dir, exist_ok=True)
+        transcoded = 0
+
+        for library_dir in library_dirs:
+            if not os.path.exists(library_dir):
+                continue
+            for name in sorted(os.listdir(library_dir)):
+                if not name.endswith(VIDEO_EXTENSIONS):
+                    continue
+                src = os.path.normpath(os.path.join(library_dir, name))
+                entry = self._refresh_source(src, force=force)
+
+                for width, height in geometries:
+                    key = _variant_key(width, height)
+                    variant = entry["variants"].get(key)
+                    if variant and variant.get("probe") and os.path.exists(variant["path"]):
+                        continue
+
+                    dst = os.path.join(self.normalized_dir, f"{entry['hash'][:16]}_{key}.mp4")
+                    if not os.path.exists(dst):
+                        print(f"Normalizing {name} -> {key} @ {TARGET_FPS}fps...")
+                        try:
+                            self._transcode(src, dst, width, height)
+                        except (OSError, subprocess.CalledProcessError) as e:
+                            print(f"  Failed to normalize {name} ({e}). Render will fall back to the raw file.")
+                            continue
+                        transcoded += 1
+                    try:
+                        variant_probe = probe_clip(dst)
+                    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+                        print(f"  Probe failed for {dst} ({e}).")
+                        variant_probe = None
+                    entry["variants"][key] = {"path": dst, "width": width, "height": height,
+                                              "fps": TARGET_FPS, "probe": variant_probe}
+
+                # Save after every source so an interrupted ingest keeps its progress
+                self.save_manifest()
+
+        print(f"Background ingest finished ({transcoded} new variants, {len(manifest)} sources).")
+        return manifest
+
+if __name__ == "__main__":
+    import sys
+    if "--scan-only" in sys.argv:
+        # Probe manifest only (duration, resolution, fps, codec, keyframes)
+        BackgroundLibrary().scan()
+    else:
+        BackgroundLibrary().ingest()
@@ -0,0 +1,156 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Reddit Candidate Pool (persisted between runs, shared by every worker on this host)
+# Filtered post dicts from listing fetches, remembered per (subreddit, sort, timeframe).
+# - A listing is fetched again only after listing_ttl; until then its unused posts are served from disk.
+# - take() hands out each candidate once (atomic across processes) and marks it used.
+# - Candidates older than candidate_ttl are dropped (deleted/locked posts, stale drama).
+# - With a scorer, candidates are scored whenever their listing is stored; take() hands out the best first
+#   and never anything below min_score (see modules/candidate_scoring.py).
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    subreddit TEXT NOT NULL,
+    sort TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (subreddit, sort, timeframe)
+);
+CREATE TABLE IF NOT EXISTS candidates (
+    post_id TEXT PRIMARY KEY,
+    subreddit TEXT NOT NULL,
+    sort TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    used_at REAL,
+    score REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS candidates_unused ON candidates (used_at, fetched_at);
+"""
+
+class CandidatePool:
+    def __init__(self, db_path, listing_ttl=1800, candidate_ttl=86400, scorer=None, min_score=0.0):
+        """scorer(post) -> (score, features, reasons); None = unranked (random order)."""
+        self.db_path = db_path
+        self.listing_ttl = listing_ttl
+        self.candidate_ttl = candidate_ttl
+        self.scorer = scorer
+        self.min_score = min_score
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(candidates)")}
+            if "score" not in columns: # Pool file from before scoring
+                self._conn.execute("ALTER TABLE candidates ADD COLUMN score REAL")
+        if scorer:
+            self._score_unscored()
+
+    def _scored(self, post):
+        """Post dict with its screening result attached (kept with the job for later tuning)."""
+        if not self.scorer:
+            return None, post
+        score, features, reasons = self.scorer(post)
+        post = dict(post, screening={"score": score, "reasons": reasons,
+                                     "spoken_s": round(features["spoken_s"], 1), "words": features["words"]})
+        return score, post
+
+    def _score_unscored(self):
+        """Scores candidates stored before a scorer was configured."""
+        with self._lock:
+            rows = self._conn.execute("SELECT post_id, data FROM candidates WHERE score IS NULL AND used_at IS NULL").fetchall()
+            updates = []
+            for post_id, data in rows:
+                score, post = self._scored(json.loads(data))
+                updates.append((score, json.dumps(post, ensure_ascii=False), post_id))
+            self._conn.executemany("UPDATE candidates SET score = ?, data = ? WHERE post_id = ?", updates)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stale_listings(self, listings, timeframe):
+        """The (subreddit, sort) pairs never fetched, or fetched longer than listing_ttl ago."""
+        cutoff = time.time() - self.listing_ttl
+        with self._lock:
+            fresh = {(sub, sort) for sub, sort in self._conn.execute(
+                "SELECT subreddit, sort FROM listings WHERE timeframe = ? AND fetched_at > ?", (timeframe, cutoff))}
+        return [listing for listing in listings if tuple(listing) not in fresh]
+
+    def add_listing(self, subreddit, sort, timeframe, posts):
+        """Stores a fetched listing. Posts already in the pool keep their used mark."""
+        now = time.time()
+        rows = []
+        for post in posts:
+            # Scored again on every fetch: upvotes and comments keep moving
+            score, post = self._scored(post)
+            rows.append((post['id'], subreddit, sort, timeframe, now, score, json.dumps(post, ensure_ascii=False)))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO listings (subreddit, sort, timeframe, fetched_at) VALUES (?, ?, ?, ?)",
+                    (subreddit, sort, timeframe, now))
+                self._conn.executemany(
+                    "INSERT INTO candidates (post_id, subreddit, sort, timeframe, fetched_at, score, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (post_id) DO UPDATE SET "
+                    "fetched_at = excluded.fetched_at, score = excluded.score, data = excluded.data", rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _usable(self):
+        """WHERE clause + params for candidates that may still be handed out."""
+        if self.scorer:
+            return "used_at IS NULL AND fetched_at > ? AND score >= ?", (time.time() - self.candidate_ttl, self.min_score)
+        return "used_at IS NULL AND fetched_at > ?", (time.time() - self.candidate_ttl,)
+
+    def take(self):
+        """
+        The best unused, unexpired candidate (random without a scorer), marked used;
+        None if the pool is dry (or only holds candidates below min_score).
+        """
+        where, params = self._usable()
+        order = "score DESC, RANDOM()" if self.scorer else "RANDOM()"
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT post_id, data FROM candidates WHERE {where} ORDER BY {order} LIMIT 1", params).fetchone()
+                if row:
+                    self._conn.execute("UPDATE candidates SET used_at = ? WHERE post_id = ?", (time.time(), row[0]))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return json.loads(row[1]) if row else None
+
+    def available(self):
+        """Unused candidates take() would still hand out."""
+        where, params = self._usable()
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM candidates WHERE {where}", params).fetchone()[0]
+
+    def rejected(self):
+        """Unused, unexpired candidates held back by the scorer (below min_score)."""
+        if not self.scorer:
+            return 0
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM candidates WHERE used_at IS NULL AND fetched_at > ? AND score < ?",
+                (time.time() - self.candidate_ttl, self.min_score)).fetchone()[0]
+
+    def prune(self):
+        """Drops expired candidates and listings. Returns how many candidates were removed."""
+        cutoff = time.time() - self.candidate_ttl
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM candidates WHERE fetched_at <= ?", (cutoff,)).rowcount
+            self._conn.execute("DELETE FROM listings WHERE fetched_at <= ?", (cutoff,))
+        return removed
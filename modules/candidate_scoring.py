@@ -0,0 +1,96 @@
+import math
+import re
+
+# Candidate Scoring (pre-screen before any LLM / TTS / render spend)
+# Cheap features straight from the listing data. A post that reads far too long or short
+# aloud, is mostly links, is an "UPDATE" to a story the viewer never heard, or was
+# removed, never reaches the LLM. The rest are ranked so the best stories go first.
+
+LINK_RE = re.compile(r"https?://\S+|www\.\S+")
+UPDATE_TITLE_RE = re.compile(r"^\s*[\[(]?\s*(final\s+)?update\b|[\[(]\s*(final\s+)?update\s*(#?\d+)?\s*[\])]"
+                             r"|\bupdate\s*(#?\d+\s*)?:", re.IGNORECASE)
+# Subreddits whose posts *are* compiled update sagas (complete stories, not follow-ups)
+UPDATE_COMPILATION_SUBS = {"bestofredditorupdates"}
+REMOVED_BODIES = {"[removed]", "[deleted]"}
+
+# Duration fit multiplies the whole score (a great post that can't fit the runtime still makes a bad video);
+# within that, every usable post starts at "base" and earns the rest from engagement and text quality.
+WEIGHTS = {"base": 0.4, "engagement": 0.35, "quality": 0.25}
+
+def post_features(post, words_per_minute=165):
+    """Listing-only features (no network, no model calls)."""
+    text = post.get('text', '') or ''
+    title = post.get('title', '') or ''
+    links = LINK_RE.findall(text)
+    prose = LINK_RE.sub(" ", text)
+    words = len(title.split()) + len(prose.split())
+    letters = [c for c in prose if c.isalpha()]
+    upvotes = max(0, int(post.get('score') or 0))
+    comments = max(0, int(post.get('num_comments') or 0))
+    return {
+        "words": words,
+        "spoken_s": words / words_per_minute * 60,
+        "links": len(links),
+        "link_char_ratio": sum(len(link) for link in links) / max(1, len(text)),
+        "caps_ratio": sum(c.isupper() for c in letters) / max(1, len(letters)),
+        "removed": text.strip().lower() in REMOVED_BODIES,
+        "update_post": bool(UPDATE_TITLE_RE.search(title)) and post.get('subreddit', '').lower() not in UPDATE_COMPILATION_SUBS,
+        "upvotes": upvotes,
+        "comment_ratio": comments / max(1, upvotes),
+        "upvote_ratio": post.get('upvote_ratio'),
+    }
+
+def _duration_fit(spoken_s, target_range):
+    """1.0 inside the target range, falling off with the log-distance outside it (0 at 4x off)."""
+    low, high = target_range
+    if low <= spoken_s <= high:
+        return 1.0
+    off = low / max(spoken_s, 1) if spoken_s < low else spoken_s / high
+    return max(0.0, 1.0 - math.log(off, 4))
+
+def score_post(post, target_range=(45, 150), words_per_minute=165, priors=None):
+    """
+    Returns (score 0..~1.2, features, reasons). Score 0 = rejected outright.
+    reasons: short human-readable notes on what pulled the score down (for logs / the job journal).
+    """
+    features = post_features(post, words_per_minute)
+    reasons = []
+
+    # --- Hard rejects ---
+    if features["removed"]:
+        return 0.0, features, ["removed/deleted body"]
+    if features["update_post"]:
+        return 0.0, features, ["update post (needs the original story)"]
+    if features["link_char_ratio"] > 0.3 or features["links"] > 5:
+        return 0.0, features, ["mostly links"]
+    duration = _duration_fit(features["spoken_s"], target_range)
+    if duration == 0.0:
+        return 0.0, features, [f"reads {features['spoken_s']:.0f}s aloud (target {target_range[0]}-{target_range[1]}s)"]
+    if duration < 1.0:
+        reasons.append(f"reads {features['spoken_s']:.0f}s aloud (target {target_range[0]}-{target_range[1]}s)")
+
+    # --- Engagement: upvotes (log scale, 10k -> 1.0), discussion, controversy ---
+    engagement = min(1.0, math.log10(features["upvotes"] + 1) / 4)
+    # Lively threads (comments vs upvotes) keep viewers commenting too; cap the bonus
+    engagement = min(1.0, engagement + min(0.2, features["comment_ratio"] * 0.2))
+    if features["upvote_ratio"] is not None and features["upvote_ratio"] < 0.6:
+        engagement *= 0.8
+        reasons.append(f"divisive ({features['upvote_ratio']:.0%} upvoted)")
+    if features["upvotes"] < 10:
+        reasons.append(f"only {features['upvotes']} upvotes")
+
+    # --- Text quality ---
+    quality = 1.0
+    if features["caps_ratio"] > 0.5:
+        quality -= 0.4
+        reasons.append("mostly caps")
+    if features["links"]:
+        quality -= min(0.3, 0.1 * features["links"])
+        reasons.append(f"{features['links']} links")
+
+    score = duration * (WEIGHTS["base"] + WEIGHTS["engagement"] * engagement
+                        + WEIGHTS["quality"] * max(0.0, quality))
+    prior = (priors or {}).get(post.get('subreddit', '').lower(), 1.0)
+    if prior != 1.0:
+        reasons.append(f"subreddit prior x{prior}")
+    return round(score * prior, 4), features, reasons
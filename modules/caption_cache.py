@@ -0,0 +1,98 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+class CaptionCache:
+    """
+    Process-wide LRU cache of rendered word cards (PIL RGBA images).
+    Memory is bounded by pixel bytes; an optional disk store lets later runs
+    (or a warm daemon after restart) skip PIL drawing entirely.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.current_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text, font_path, fontsize, stroke_width, text_color, stroke_color):
+        return (text, os.path.abspath(font_path), fontsize, stroke_width, text_color, stroke_color)
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.png")
+
+    def get(self, key):
+        with self._lock:
+            img = self._entries.get(key)
+            if img is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return img
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            if os.path.exists(path):
+                try:
+                    from PIL import Image
+                    with Image.open(path) as f:
+                        img = f.convert("RGBA")
+                    self.disk_hits += 1
+                    self._remember(key, img)
+                    return img
+                except Exception as e:
+                    print(f"Caption cache: unreadable card {path} ({e}). Re-rendering.")
+
+        self.misses += 1
+        return None
+
+    def put(self, key, img):
+        self._remember(key, img)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            if not os.path.exists(path):
+                # Write-then-rename so a concurrent reader never sees half a PNG
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                try:
+                    img.save(tmp_path, format="PNG")
+                    os.replace(tmp_path, path)
+                except OSError as e:
+                    print(f"Caption cache: could not persist card ({e}).")
+        return img
+
+    def _remember(self, key, img):
+        size = img.width * img.height * 4
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = img
+            self.current_bytes += size
+            # Evict least recently used cards until we fit the budget
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, old = self._entries.popitem(last=False)
+                self.current_bytes -= old.width * old.height * 4
+
+    def stats(self):
+        return (f"{len(self._entries)} cards, {self.current_bytes / 1e6:.1f} MB | "
+                f"hits {self.hits}, disk {self.disk_hits}, renders {self.misses}")
+
+_default_cache = None
+
+def get_caption_cache():
+    """Returns the shared cache, configured from config.py on first use."""
+    global _default_cache
+    if _default_cache is None:
+        from config import CAPTION_CACHE_MAX_MB, CAPTION_CACHE_DIR
+        _default_cache = CaptionCache(max_bytes=CAPTION_CACHE_MAX_MB * 1024 * 1024, disk_dir=CAPTION_CACHE_DIR)
+    return _default_cache
@@ -0,0 +1,116 @@
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+MIN_CHUNK_SECONDS = 10 # Below this, process startup + clip loading outweighs the split
+GOP_SECONDS = 1 # Chunk boundaries land on (about) whole seconds -> every chunk starts on a keyframe
+
+def gop_frames(fps):
+    """Keyframe interval in whole frames (about GOP_SECONDS; fractional fps such as 29.97 rounds)."""
+    return max(1, round(fps * GOP_SECONDS))
+
+def plan_chunks(duration, workers, fps, min_chunk=MIN_CHUNK_SECONDS):
+    """
+    Splits [0, duration] into at most `workers` ranges whose boundaries are whole
+    GOPs of gop_frames(fps) frames (and therefore whole frames), so the concatenated
+    frame sequence is identical to a single-pass render. Returns list of (start, end).
+    """
+    n = max(1, min(workers, int(duration // min_chunk)))
+    gop = gop_frames(fps) / fps
+    total_gops = math.ceil(duration / gop)
+    gops_per_chunk = math.ceil(total_gops / n)
+
+    chunks = []
+    start = 0.0
+    while start < duration:
+        end = min(start + gops_per_chunk * gop, duration)
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+def slice_plan(plan, start, end):
+    """Copy of the plan with only the overlays visible in [start, end) (each worker gets its own layer slice)."""
+    sliced = dict(plan)
+    sliced["overlays"] = [o for o in plan["overlays"]
+                          if o["start"] < end and o["start"] + o["duration"] > start]
+    return sliced
+
+def render_chunk(plan, start, end, output_filepath, threads):
+    """Worker: renders the video-only range [start, end) of a plan."""
+    from modules.video_engine import build_moviepy_clip
+    from modules.render_profiles import moviepy_write_kwargs
+
+    final_clip, sources = build_moviepy_clip(plan, with_audio=False)
+    chunk = final_clip.subclip(start, end)
+    fps = plan["fps"]
+    profile = dict(plan["profile"], threads=threads)
+    chunk.write_videofile(
+        output_filepath,
+        audio=False,
+        logger=None,
+        **moviepy_write_kwargs(profile, ['-g', str(gop_frames(fps)), '-keyint_min', str(gop_frames(fps))])
+    )
+    final_clip.close()
+    for clip in sources:
+        clip.close()
+    return output_filepath
+
+def render_chunked(plan, output_filepath, workers):
+    """
+    Renders the plan's video in parallel time ranges, joins them with the concat
+    demuxer (stream copy, no re-encode) and muxes the mixed audio once over the whole timeline.
+    """
+    from modules.video_engine import build_moviepy_audio
+
+    chunks = plan_chunks(plan["duration"], workers, plan["fps"])
+    if len(chunks) == 1:
+        from modules.video_engine import render_with_moviepy
+        print("Video too short to split. Rendering in one pass.")
+        return render_with_moviepy(plan, output_filepath)
+
+    threads = max(1, (os.cpu_count() or 1) // len(chunks))
+    work_dir = tempfile.mkdtemp(prefix="chunks_", dir=os.path.dirname(os.path.abspath(output_filepath)))
+    print(f"Chunked render: {len(chunks)} chunks x {threads} encoder threads...")
+
+    try:
+        chunk_paths = [os.path.join(work_dir, f"chunk_{i:03d}.mp4") for i in range(len(chunks))]
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            futures = [
+                pool.submit(render_chunk, slice_plan(plan, start, end), start, end, path, threads)
+                for (start, end), path in zip(chunks, chunk_paths)
+            ]
+
+            # Meanwhile: mix and encode the audio once, for the whole timeline
+            audio_path = os.path.join(work_dir, "audio.m4a")
+            final_audio, narration = build_moviepy_audio(plan)
+            final_audio.write_audiofile(audio_path, fps=44100, codec='aac',
+                                        bitrate=plan["profile"].get("audio_bitrate"), logger=None)
+            narration.close()
+
+            for future in futures:
+                future.result() # re-raise worker errors
+
+        list_path = os.path.join(work_dir, "chunks.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in chunk_paths:
+                f.write(f"file '{os.path.basename(path)}'\n")
+
+        cmd = [
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-i", audio_path,
+            "-map", "0:v", "-map", "1:a",
+            "-c", "copy",
+            "-t", f"{plan['duration']:.3f}",
+            "-movflags", "+faststart",
+            output_filepath
+        ]
+        result = subprocess.run(cmd, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Chunk concat failed: {result.stderr[-2000:]}")
+        return output_filepath
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
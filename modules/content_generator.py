@@ -1,19 +1,28 @@
 import asyncio
-from openai import OpenAI
-import edge_tts
 import random
 import os
 import json
 from config import *
+from modules.tts_cache import get_tts_cache
+from modules.mp3_stitch import stitch_mp3
+from modules.tracing import span
 
 class ContentGenerator:
     def __init__(self):
-        self.client = OpenAI(
-            api_key=OPENAI_API_KEY, 
-            base_url=OPENAI_BASE_URL
-        )
+        self._client = None
         self.model = AI_MODEL_NAME
 
+    @property
+    def client(self):
+        """OpenAI client, created on first use (importing openai alone takes ~1s)."""
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(
+                api_key=OPENAI_API_KEY, 
+                base_url=OPENAI_BASE_URL
+            )
+        return self._client
+
     def generate_script(self, post_data):
         """
         Uses LLM to clean up Reddit post and create a caption.
@@ -64,14 +73,15 @@ class ContentGenerator:
         
         try:
             print(f"Generating script from LLM (Persona: {persona_role[:30]}...)...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content}
-                ],
-                response_format={ "type": "json_object" }
-            )
+            with span("llm.completion", model=self.model, subreddit=subreddit):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_content}
+                    ],
+                    response_format={ "type": "json_object" }
+                )
             content = response.choices[0].message.content
             print(f"DEBUG LLM CONTENT: {content}")
             data = json.loads(content)
@@ -120,52 +130,79 @@ class ContentGenerator:
 
     async def _generate_single_segment(self, text, voice, output_filename, offset_s=0):
         """Helper to generate audio for one segment."""
-        # Sanitize
-        clean_text = text.replace('"', '').replace("'", "").replace("’", "").strip()
-        if not clean_text: return None
-
-        print(f"  Generating segment ({len(clean_text)} chars) with {voice}...")
-        
         output_abs = os.path.abspath(output_filename)
-        base_name = os.path.splitext(output_abs)[0]
-        json_filename = base_name + ".json"
-        
-        # Windows Loop Fix
-        if os.name == "nt":
-            try:
-                asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-            except: pass
+        boundaries = await self._synthesize_segment(text, voice, output_abs)
+        if boundaries is None: return None
+
+        json_filename = os.path.splitext(output_abs)[0] + ".json"
+        word_data = self._word_data(boundaries, offset_s)
 
-        communicate = edge_tts.Communicate(clean_text, voice)
-        word_data = []
-        
-        with open(output_abs, "wb") as file:
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    file.write(chunk["data"])
-                elif chunk["type"] == "WordBoundary":
-                    # Calculate timing with global offset
-                    start_s = (chunk["offset"] / 1e7) + offset_s
-                    duration_s = chunk["duration"] / 1e7
-                    end_s = start_s + duration_s
-                    word_txt = chunk["text"]
-                    
-                    word_data.append({
-                        "word": word_txt,
-                        "start": start_s,
-                        "end": end_s
-                    })
-        
         # Save Metadata
         with open(json_filename, "w", encoding="utf-8") as f:
             json.dump(word_data, f, indent=2)
             
         return output_abs, json_filename, word_data
 
+    async def _synthesize_segment(self, text, voice, output_abs):
+        """
+        Streams one segment from edge-tts into output_abs.
+        Returns the raw word boundaries [(word, start_s, duration_s)] relative to the
+        segment start (None if the text is empty).
+        """
+        with span("tts.segment", voice=voice, chars=len(text)) as sp:
+            # Sanitize
+            clean_text = text.replace('"', '').replace("'", "").replace("’", "").strip()
+            if not clean_text: return None
+
+            # Cache hit -> no round trip to the TTS service
+            cache = get_tts_cache()
+            cache_key = cache.make_key(clean_text, voice) if cache else None
+            if cache:
+                boundaries = cache.get(cache_key, output_abs)
+                if boundaries is not None:
+                    print(f"  Segment cached ({len(clean_text)} chars, {voice}).")
+                    sp.set(cached=True)
+                    return boundaries
+
+            print(f"  Generating segment ({len(clean_text)} chars) with {voice}...")
+        
+            # Windows Loop Fix
+            if os.name == "nt":
+                try:
+                    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+                except: pass
+
+            import edge_tts
+            communicate = edge_tts.Communicate(clean_text, voice)
+            boundaries = []
+        
+            with open(output_abs, "wb") as file:
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        file.write(chunk["data"])
+                    elif chunk["type"] == "WordBoundary":
+                        boundaries.append((chunk["text"], chunk["offset"] / 1e7, chunk["duration"] / 1e7))
+
+            if cache and os.path.getsize(output_abs) > 0:
+                cache.put(cache_key, output_abs, boundaries)
+            return boundaries
+
+    def _word_data(self, boundaries, offset_s):
+        """Word timing dicts with the segment's global offset applied."""
+        word_data = []
+        for word_txt, start, duration_s in boundaries:
+            # Calculate timing with global offset
+            start_s = start + offset_s
+            word_data.append({
+                "word": word_txt,
+                "start": start_s,
+                "end": start_s + duration_s
+            })
+        return word_data
+
     async def _generate_multi_voice_audio(self, segments, final_output_filename, context_data=None):
         """Stitches multiple TTS segments into one file and merges timestamps."""
-        from moviepy.editor import concatenate_audioclips, AudioFileClip
-        
+
         # Voice Mapping
         NARRATOR_VOICE = random.choice(TTS_VOICES)
         
@@ -198,9 +235,13 @@ class ContentGenerator:
         master_vtt_abs = os.path.splitext(final_output_abs)[0] + ".vtt"
 
         try:
-            clips = []
-            
-            for i, seg in enumerate(segments):
+            # 1. Synthesize every segment concurrently (bounded). Offsets depend on the
+            #    durations of all earlier segments, so they are applied afterwards.
+            semaphore = asyncio.Semaphore(TTS_CONCURRENCY)
+            # Named after the output (unique per job), not the cwd: parallel workers share the directory
+            seg_base = os.path.splitext(final_output_abs)[0]
+
+            async def synthesize(i, seg):
                 role = seg.get('role', 'narrator')
                 text = seg.get('text', '')
                 
@@ -208,53 +249,67 @@ class ContentGenerator:
                 voice = heckler_voice if role == 'heckler' else NARRATOR_VOICE
                 
                 # Generate Temp Segment
-                seg_filename = f"temp_seg_{i}_{random.randint(100,999)}.mp3"
-                result = await self._generate_single_segment(text, voice, seg_filename, offset_s=current_offset)
-                
-                if result:
-                    audio_path, json_path, data = result
-                    temp_files.append(audio_path)
-                    temp_files.append(json_path)
-                    
-                    # Add to clips for merging
-                    clip = AudioFileClip(audio_path)
-                    clips.append(clip)
-                    
-                    # Update Offset
-                    duration = clip.duration
-                    current_offset += duration
-                    
-                    # Append Data
-                    if not data:
-                        print(f"  Warning: No timing data for segment {i}. Estimating...")
-                        words = text.split()
-                        if words:
-                            total_chars = sum(len(w) for w in words)
-                            if total_chars == 0: total_chars = 1
-                            char_duration = duration / total_chars
-                            est_data = []
-                            est_offset = current_offset - duration # current_offset was already incremented
-                            temp_time = est_offset
-                            for w in words:
-                                w_dur = len(w) * char_duration
-                                est_data.append({
-                                    "word": w,
-                                    "start": temp_time,
-                                    "end": temp_time + w_dur
-                                })
-                                temp_time += w_dur
-                            master_word_data.extend(est_data)
-                    else:
-                        master_word_data.extend(data)
-            
-            # Stitch Audio
+                seg_filename = f"{seg_base}_seg_{i}.mp3"
+                async with semaphore:
+                    boundaries = await self._synthesize_segment(text, voice, seg_filename)
+                if boundaries is None: return None
+                return seg_filename, boundaries
+
+            print(f"  Synthesizing {len(segments)} segments (up to {TTS_CONCURRENCY} at a time)...")
+            results = await asyncio.gather(*(synthesize(i, seg) for i, seg in enumerate(segments)),
+                                           return_exceptions=True)
+            for result in results:
+                if result and not isinstance(result, BaseException):
+                    temp_files.append(result[0])
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+
+            # 2. Stitch at the frame level (durations come from the frame headers).
+            #    The narration is encoded only once more: in the final video container.
+            placed = [(i, seg, result) for i, (seg, result) in enumerate(zip(segments, results)) if result]
+            if not placed:
+                print("  Every segment failed to synthesize. No audio.")
+                return None
+            audio_paths = [result[0] for _, _, result in placed]
             print("  Stitching dialogue segments...")
-            final_audio = concatenate_audioclips(clips)
-            final_audio.write_audiofile(final_output_abs, logger=None)
-            
-            # Close clips to release files
-            for clip in clips: clip.close()
-            final_audio.close()
+            try:
+                durations = stitch_mp3(audio_paths, final_output_abs)
+            except ValueError as e:
+                print(f"  Frame-level stitch not possible ({e}). Re-encoding with MoviePy...")
+                durations = self._stitch_with_moviepy(audio_paths, final_output_abs)
+
+            # 3. Place segments on the timeline in script order
+            for (i, seg, result), duration in zip(placed, durations):
+                text = seg.get('text', '')
+                audio_path, boundaries = result
+                data = self._word_data(boundaries, current_offset)
+                
+                # Update Offset
+                current_offset += duration
+                
+                # Append Data
+                if not data:
+                    print(f"  Warning: No timing data for segment {i}. Estimating...")
+                    words = text.split()
+                    if words:
+                        total_chars = sum(len(w) for w in words)
+                        if total_chars == 0: total_chars = 1
+                        char_duration = duration / total_chars
+                        est_data = []
+                        est_offset = current_offset - duration # current_offset was already incremented
+                        temp_time = est_offset
+                        for w in words:
+                            w_dur = len(w) * char_duration
+                            est_data.append({
+                                "word": w,
+                                "start": temp_time,
+                                "end": temp_time + w_dur
+                            })
+                            temp_time += w_dur
+                        master_word_data.extend(est_data)
+                else:
+                    master_word_data.extend(data)
             
             # Save Master JSON
             with open(master_json_abs, "w", encoding="utf-8") as f:
@@ -280,6 +335,20 @@ class ContentGenerator:
             traceback.print_exc()
             return None
 
+    def _stitch_with_moviepy(self, audio_paths, output_abs):
+        """Fallback for segments that can't be joined frame by frame (mixed formats). Returns durations."""
+        from moviepy.editor import concatenate_audioclips, AudioFileClip
+
+        clips = [AudioFileClip(path) for path in audio_paths]
+        final_audio = concatenate_audioclips(clips)
+        final_audio.write_audiofile(output_abs, logger=None)
+        durations = [clip.duration for clip in clips]
+        
+        # Close clips to release files
+        for clip in clips: clip.close()
+        final_audio.close()
+        return durations
+
     def _format_vtt_time(self, seconds):
         # Format: 00:00:00.000
         ms = int((seconds % 1) * 1000)
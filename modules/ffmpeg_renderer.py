@@ -0,0 +1,173 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from config import FONT_PATH
+from modules.caption_cache import get_caption_cache
+from modules.timing import timed
+from modules.subtitle_renderer import (
+    load_word_timings, render_caption_image, CAPTION_Y_RATIO
+)
+
+# Same curve as subtitle_renderer.pop_scale, written as an ffmpeg expression.
+# T is the time since the word appeared.
+POP_SCALE_EXPR = "if(lt(T,0.1),0.5+7*T,if(lt(T,0.2),1.2-2*(T-0.1),1))"
+
+def _fmt(t):
+    return f"{t:.3f}"
+
+def build_ffmpeg_command(plan, output_filepath, work_dir):
+    """
+    Translates a VideoEngine render plan into a single ffmpeg invocation.
+    Returns (cmd, filtergraph). The filtergraph is passed via a script file
+    because long stories produce graphs well past the Windows command line limit.
+    """
+    from modules.video_engine import OVERLAY_WIDTH_RATIO, OVERLAY_FADE, REFERENCE_HEIGHT
+    from modules.render_profiles import x264_ffmpeg_args
+
+    W, H, fps = plan["width"], plan["height"], plan["fps"]
+    duration = plan["duration"]
+
+    inputs = []
+    graph = []
+
+    input_count = 0
+    def add_input(path, *opts):
+        """Appends an input with its options, returns its ffmpeg input index."""
+        nonlocal input_count
+        inputs.extend(list(opts) + ["-i", path])
+        input_count += 1
+        return input_count - 1
+
+    # --- Input 0: Narration ---
+    narration_idx = add_input(plan["audio_path"])
+
+    # --- BACKGROUND (scale/crop cover, vstack in brainrot mode) ---
+    bg_labels = []
+    for i, layer in enumerate(plan["backgrounds"]):
+        if layer["source_duration"] < duration:
+            # Too short -> loop from the start (same as vfx.loop)
+            idx = add_input(layer["path"], "-stream_loop", "-1", "-t", _fmt(duration))
+        else:
+            idx = add_input(layer["path"], "-ss", _fmt(layer["start"]), "-t", _fmt(duration))
+
+        lw, lh = layer["width"], layer["height"]
+        if layer.get("normalized"):
+            # Pre-normalized variant: already cover-cropped to this geometry
+            cover = ""
+        else:
+            cover = f"scale={lw}:{lh}:force_original_aspect_ratio=increase,crop={lw}:{lh},"
+        graph.append(f"[{idx}:v]fps={fps},{cover}setsar=1,setpts=PTS-STARTPTS[bg{i}]")
+        bg_labels.append(f"[bg{i}]")
+
+    if len(bg_labels) > 1:
+        graph.append(f"{''.join(bg_labels)}vstack=inputs={len(bg_labels)}[base0]")
+    else:
+        graph.append(f"{bg_labels[0]}null[base0]")
+
+    current = "base0"
+    step = 0
+    def chain_overlay(overlay_label, x, y):
+        nonlocal current, step
+        step += 1
+        out = f"base{step}"
+        graph.append(f"[{current}][{overlay_label}]overlay=x='{x}':y='{y}':eof_action=pass[{out}]")
+        current = out
+
+    # --- IMAGE OVERLAYS (timed, alpha fades) ---
+    overlay_w = int(W * OVERLAY_WIDTH_RATIO)
+    for i, overlay in enumerate(plan["overlays"]):
+        d = overlay["duration"]
+        idx = add_input(overlay["path"], "-loop", "1", "-framerate", str(fps), "-t", _fmt(d))
+        # Prepared overlays are already at their on-screen size
+        size = "" if overlay.get("width") == overlay_w else f"scale={overlay_w}:-1,"
+        graph.append(
+            f"[{idx}:v]{size}format=rgba,"
+            f"fade=t=in:st=0:d={OVERLAY_FADE}:alpha=1,"
+            f"fade=t=out:st={_fmt(d - OVERLAY_FADE)}:d={OVERLAY_FADE}:alpha=1,"
+            f"setpts=PTS-STARTPTS+{_fmt(overlay['start'])}/TB[img{i}]"
+        )
+        chain_overlay(f"img{i}", "(W-w)/2", "(H-h)/2")
+
+    # --- SUBTITLES (one input per unique word card, split per occurrence) ---
+    if plan["subtitle_file"]:
+        print(f"Adding subtitles from {os.path.basename(plan['subtitle_file'])}...")
+        timings = load_word_timings(plan["subtitle_file"])
+
+        occurrences = {}
+        for n, (word, start, d) in enumerate(timings):
+            occurrences.setdefault(word, []).append((n, start, d))
+
+        for card_n, (word, uses) in enumerate(occurrences.items()):
+            card_path = os.path.join(work_dir, f"card_{card_n}.png")
+            render_caption_image(word, FONT_PATH, scale=H / REFERENCE_HEIGHT).save(card_path)
+            idx = add_input(card_path, "-loop", "1", "-framerate", str(fps), "-t", _fmt(duration))
+
+            labels = [f"w{n}src" for n, _, _ in uses]
+            if len(uses) > 1:
+                graph.append(f"[{idx}:v]split={len(uses)}{''.join(f'[{l}]' for l in labels)}")
+            else:
+                graph.append(f"[{idx}:v]null[{labels[0]}]")
+
+            for (n, start, d), label in zip(uses, labels):
+                pop = POP_SCALE_EXPR.replace("T", f"(t-{_fmt(start)})")
+                graph.append(
+                    f"[{label}]trim=duration={_fmt(d)},setpts=PTS-STARTPTS+{_fmt(start)}/TB,"
+                    f"scale=w='iw*{pop}':h='ih*{pop}':eval=frame[w{n}]"
+                )
+
+        print(f"Caption cache: {get_caption_cache().stats()}")
+
+        # Chain in timing order so later words draw over earlier ones (like the MoviePy layer list)
+        for n, (word, start, d) in enumerate(timings):
+            chain_overlay(f"w{n}", "(W-w)/2", _fmt(H * CAPTION_Y_RATIO))
+
+    graph.append(f"[{current}]format=yuv420p[vout]")
+
+    # --- AUDIO (narration + looped, attenuated BGM) ---
+    bgm = plan["bgm"]
+    if bgm:
+        idx = add_input(bgm["path"], "-stream_loop", "-1", "-ss", _fmt(bgm["start"]))
+        graph.append(f"[{idx}:a]volume={bgm['volume']},atrim=duration={_fmt(duration)}[bgm]")
+        graph.append(f"[{narration_idx}:a][bgm]amix=inputs=2:duration=first:dropout_transition=0:normalize=0[aout]")
+    else:
+        graph.append(f"[{narration_idx}:a]anull[aout]")
+
+    filtergraph = ";\n".join(graph)
+    graph_path = os.path.join(work_dir, "filtergraph.txt")
+    with open(graph_path, "w", encoding="utf-8") as f:
+        f.write(filtergraph)
+
+    profile = plan["profile"]
+    audio_args = ["-c:a", "aac", "-ar", "44100"]
+    if profile.get("audio_bitrate"):
+        audio_args += ["-b:a", profile["audio_bitrate"]]
+
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-stats"] + inputs + [
+        "-filter_complex_script", graph_path,
+        "-map", "[vout]", "-map", "[aout]",
+        "-r", str(fps),
+    ] + x264_ffmpeg_args(profile) + audio_args + [
+        "-t", _fmt(duration),
+        "-movflags", "+faststart",
+        output_filepath
+    ]
+    return cmd, filtergraph
+
+def render_with_ffmpeg(plan, output_filepath, timings=None):
+    """
+    Renders a plan with one ffmpeg process (no per-frame Python).
+    timings: optional dict that receives per-phase wall times.
+    """
+    work_dir = tempfile.mkdtemp(prefix="ffmpeg_render_")
+    try:
+        with timed(timings, "build_graph"):
+            cmd, _ = build_ffmpeg_command(plan, output_filepath, work_dir)
+        print(f"Running ffmpeg filtergraph render ({cmd.count('-i')} inputs)...")
+        with timed(timings, "composite_encode"):
+            result = subprocess.run(cmd, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg render failed: {result.stderr[-2000:]}")
+        return output_filepath
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -1,7 +1,9 @@
 import os
 import requests
 import random
-from duckduckgo_search import DDGS
+import shutil
+import uuid
+from modules.tracing import span
 
 # Curated Library of High-Quality Cinematic Search Terms
 # Curated Library of Meme/Reaction Search Terms (Dopamine Focused)
@@ -78,63 +80,60 @@ def download_image(query, output_dir, filename_prefix="img"):
     for i, search_term in enumerate(strategies):
         print(f"  Attempt {i+1}/{len(strategies)}: Searching for '{search_term}'...")
         
-        try:
-            from bing_image_downloader import downloader
-            import shutil
-            import glob
-            
-            download_folder = os.path.join(output_dir, "bing_temp")
-            if os.path.exists(download_folder):
-                shutil.rmtree(download_folder)
+        # Own scratch folder per attempt: other jobs/workers download into the same output_dir
+        download_folder = os.path.join(output_dir, f"bing_temp_{uuid.uuid4().hex[:12]}")
+        with span("images.search", strategy=i + 1, term=search_term, source="bing"):
+            try:
+                from bing_image_downloader import downloader
+                import glob
             
-            downloader.download(
-                search_term, 
-                limit=5, # Increased limit for better hit rate
-                output_dir=download_folder, 
-                adult_filter_off=True, 
-                force_replace=False, 
-                timeout=10, # Increased timeout
-                verbose=False
-            )
+                downloader.download(
+                    search_term, 
+                    limit=5, # Increased limit for better hit rate
+                    output_dir=download_folder, 
+                    adult_filter_off=True, 
+                    force_replace=False, 
+                    timeout=10, # Increased timeout
+                    verbose=False
+                )
             
-            # Find downloaded images
-            query_folder = os.path.join(download_folder, search_term)
-            if not os.path.exists(query_folder):
-                subfolders = glob.glob(os.path.join(download_folder, "*"))
-                if subfolders:
-                    query_folder = subfolders[0]
+                # Find downloaded images
+                query_folder = os.path.join(download_folder, search_term)
+                if not os.path.exists(query_folder):
+                    subfolders = glob.glob(os.path.join(download_folder, "*"))
+                    if subfolders:
+                        query_folder = subfolders[0]
             
-            if os.path.exists(query_folder):
-                extensions = ['*.jpg', '*.jpeg', '*.png']
-                images = []
-                for ext in extensions:
-                    images.extend(glob.glob(os.path.join(query_folder, ext)))
+                if os.path.exists(query_folder):
+                    extensions = ['*.jpg', '*.jpeg', '*.png']
+                    images = []
+                    for ext in extensions:
+                        images.extend(glob.glob(os.path.join(query_folder, ext)))
                     
-                if images:
-                    chosen_image = random.choice(images)
-                    final_filename = f"{filename_prefix}_{random.randint(1000,9999)}.jpg"
-                    final_path = os.path.join(output_dir, final_filename)
-                    shutil.move(chosen_image, final_path)
-                    print(f"  Success on attempt {i+1}: {final_path}")
-                    
-                    # Cleanup
-                    try: shutil.rmtree(download_folder)
-                    except: pass
-                    return final_path
+                    if images:
+                        chosen_image = random.choice(images)
+                        final_filename = f"{filename_prefix}_{uuid.uuid4().hex[:12]}.jpg"
+                        final_path = os.path.join(output_dir, final_filename)
+                        shutil.move(chosen_image, final_path)
+                        print(f"  Success on attempt {i+1}: {final_path}")
+                        return final_path
             
-            print(f"  Attempt {i+1} failed to yield images.")
+                print(f"  Attempt {i+1} failed to yield images.")
 
-        except Exception as e:
-            print(f"  Attempt {i+1} error: {e}")
+            except Exception as e:
+                print(f"  Attempt {i+1} error: {e}")
+            finally:
+                shutil.rmtree(download_folder, ignore_errors=True)
             
     # 2. Final Fallback: DuckDuckGo Search
     print("Bing failed all attempts. Trying DuckDuckGo...")
     try:
-        with DDGS() as ddgs:
+        from duckduckgo_search import DDGS
+        with span("images.search", strategy="ddg", term=query, source="duckduckgo"), DDGS() as ddgs:
             results = list(ddgs.images(query, max_results=5))
             if results:
                 url = results[0]['image']
-                final_filename = f"{filename_prefix}_ddg_{random.randint(1000,9999)}.jpg"
+                final_filename = f"{filename_prefix}_ddg_{uuid.uuid4().hex[:12]}.jpg"
                 final_path = os.path.join(output_dir, final_filename)
                 
                 resp = requests.get(url, timeout=10)
@@ -171,7 +170,7 @@ def generate_placeholder(text, output_dir, prefix):
         # Draw centered text (simple approx)
         d.text((640, 360), f"IMG: {text}", fill=(255,255,255), anchor="mm", font=font)
         
-        filename = f"{prefix}_placeholder_{random.randint(1000,9999)}.jpg"
+        filename = f"{prefix}_placeholder_{uuid.uuid4().hex[:12]}.jpg"
         path = os.path.join(output_dir, filename)
         img.save(path)
         print(f"Generated Placeholder: {path}")
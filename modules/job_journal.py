@@ -0,0 +1,87 @@
+import json
+import os
+import time
+
+JOURNAL_DIR = "output/jobs"
+
+# Files each completed stage leaves behind. If one is gone on resume, that stage runs again.
+STAGE_FILES = {
+    "audio": lambda job: [job.get("audio_path"), job.get("sync_path")],
+    "assets": lambda job: _plan_files(job.get("plan") or {}),
+    "render": lambda job: [job.get("video_path")],
+}
+
+def _plan_files(plan):
+    files = [plan.get("audio_path"), plan.get("subtitle_file")]
+    files += [layer["path"] for layer in plan.get("backgrounds", [])]
+    files += [overlay["path"] for overlay in plan.get("overlays", [])]
+    if plan.get("bgm"):
+        files.append(plan["bgm"]["path"])
+    return [f for f in files if f] or [None]
+
+class JobJournal:
+    """
+    One JSON file per job recording everything earlier stages produced
+    (post, script_data, audio/sync paths, render plan, video path) and which
+    stages completed. Files are replaced atomically, so a kill mid-stage leaves
+    the last completed checkpoint intact and only the interrupted stage is redone.
+    """
+    def __init__(self, journal_dir=JOURNAL_DIR):
+        self.journal_dir = journal_dir
+        os.makedirs(self.journal_dir, exist_ok=True)
+
+    def _path(self, job_id):
+        return os.path.join(self.journal_dir, f"{job_id}.json")
+
+    def _write(self, job):
+        path = self._path(job["id"])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        job["updated_at"] = time.time()
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def checkpoint(self, job, stage):
+        """Records a completed stage (and the job data it produced)."""
+        if stage not in job.setdefault("completed", []):
+            job["completed"].append(stage)
+        job["status"] = "done" if stage == "sidecar" else "running"
+        job.pop("error", None)
+        self._write(job)
+
+    def mark_failed(self, job, stage, error):
+        if not job.get("completed"):
+            return # Nothing worth resuming yet
+        job["status"] = "failed"
+        job["error"] = f"{stage}: {error}"
+        self._write(job)
+
+    def unfinished(self):
+        """Jobs that stopped before their last stage, oldest first, rolled back to stages whose files still exist."""
+        jobs = []
+        for name in sorted(os.listdir(self.journal_dir)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.journal_dir, name), "r", encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Job journal: skipping unreadable entry {name} ({e}).")
+                continue
+            if job.get("status") == "done" or not job.get("completed"):
+                continue
+
+            # Drop a stage (and everything after it) if its outputs were cleaned up
+            completed = []
+            for stage in job["completed"]:
+                files = STAGE_FILES.get(stage, lambda j: [])(job)
+                if not all(f and os.path.exists(f) for f in files):
+                    print(f"Job {job['id']}: output of stage '{stage}' is missing. Redoing from there.")
+                    break
+                completed.append(stage)
+            job["completed"] = completed
+            jobs.append(job)
+        jobs.sort(key=lambda j: j.get("created_at", 0))
+        return jobs
@@ -0,0 +1,59 @@
+import json
+import subprocess
+
+def probe_media(path):
+    """
+    Reads stream metadata with ffprobe (no decoding).
+    Returns dict with duration, width, height, fps, codec (video keys only for video files).
+    """
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration:stream=codec_type,codec_name,width,height,avg_frame_rate,duration",
+        "-of", "json", path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    data = json.loads(result.stdout or "{}")
+
+    info = {"duration": float(data.get("format", {}).get("duration") or 0.0)}
+
+    for stream in data.get("streams", []):
+        if stream.get("codec_type") == "video" and "width" not in info:
+            info["width"] = int(stream["width"])
+            info["height"] = int(stream["height"])
+            info["codec"] = stream.get("codec_name")
+
+            # avg_frame_rate is a fraction like "30000/1001"
+            num, _, den = (stream.get("avg_frame_rate") or "0/1").partition("/")
+            info["fps"] = float(num) / float(den) if den and float(den) else 0.0
+        elif stream.get("codec_type") == "audio" and "audio_codec" not in info:
+            info["audio_codec"] = stream.get("codec_name")
+
+    return info
+
+def probe_duration(path):
+    """Duration in seconds from container metadata."""
+    try:
+        return probe_media(path)["duration"]
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        # ffprobe missing or unreadable file -> let MoviePy's parser have a go
+        print(f"ffprobe failed for {path} ({e}). Falling back to MoviePy probe.")
+        from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+        return ffmpeg_parse_infos(path)["duration"]
+
+def probe_keyframes(path):
+    """
+    Keyframe timestamps (seconds) of the first video stream.
+    Reads packet headers only (demux, no decode), so it is cheap even for long files.
+    """
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.append(round(float(pts_time), 3))
+    return sorted(keyframes)
@@ -0,0 +1,123 @@
+import os
+
+# MPEG audio (Layer III only: edge-tts always returns MP3) frame header tables
+_BITRATES_KBPS = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],  # MPEG-1
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],      # MPEG-2 / 2.5
+}
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+def _skip_id3v2(data):
+    """Offset of the first byte after a leading ID3v2 tag (0 if there is none)."""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9] # synchsafe
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def _parse_header(data, pos):
+    """(frame_length, sample_rate, channels, samples_per_frame, version_id) or None if not a Layer III frame."""
+    if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return None
+    version_id = (data[pos + 1] >> 3) & 0x03
+    layer = (data[pos + 1] >> 1) & 0x03
+    bitrate_idx = (data[pos + 2] >> 4) & 0x0F
+    rate_idx = (data[pos + 2] >> 2) & 0x03
+    padding = (data[pos + 2] >> 1) & 0x01
+    channels = 1 if (data[pos + 3] >> 6) == 0x03 else 2
+    if version_id == 1 or layer != 1 or bitrate_idx in (0, 15) or rate_idx == 3:
+        return None # reserved / free-format / not Layer III
+
+    mpeg1 = version_id == 3
+    bitrate = _BITRATES_KBPS[1 if mpeg1 else 2][bitrate_idx] * 1000
+    sample_rate = _SAMPLE_RATES[version_id][rate_idx]
+    samples = 1152 if mpeg1 else 576
+    length = (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+    return length, sample_rate, channels, samples, version_id
+
+def _is_info_frame(data, pos, version_id, channels):
+    """Xing/Info/VBRI frames carry stream metadata, not audio; mid-stream they'd play as a glitch."""
+    if version_id == 3:
+        side_info = 17 if channels == 1 else 32
+    else:
+        side_info = 9 if channels == 1 else 17
+    tag = data[pos + 4 + side_info:pos + 8 + side_info]
+    return tag in (b"Xing", b"Info") or data[pos + 36:pos + 40] == b"VBRI"
+
+def scan_mp3(data):
+    """
+    Walks the frame headers of an MP3 byte string (no decoding).
+    Returns {"frames": [(offset, length)], "sample_rate", "channels", "duration"}.
+    Raises ValueError if the data is not a consistent Layer III stream.
+    """
+    pos = _skip_id3v2(data)
+    frames = []
+    fmt = None
+    samples_total = 0
+
+    while pos + 4 <= len(data):
+        header = _parse_header(data, pos)
+        if header is None:
+            if data[pos:pos + 3] == b"TAG" or not frames:
+                # ID3v1 trailer, or junk before the first frame
+                if frames:
+                    break
+                pos += 1
+                continue
+            break # trailing garbage
+        length, sample_rate, channels, samples, version_id = header
+        if pos + length > len(data):
+            break # truncated last frame: drop it like a decoder would
+
+        if fmt is None and _is_info_frame(data, pos, version_id, channels):
+            pos += length
+            continue
+        if fmt is None:
+            fmt = (sample_rate, channels)
+        elif fmt != (sample_rate, channels):
+            raise ValueError(f"MP3 format changes mid-stream ({fmt} -> {(sample_rate, channels)})")
+
+        frames.append((pos, length))
+        samples_total += samples
+        pos += length
+
+    if not frames:
+        raise ValueError("No MPEG Layer III frames found")
+    return {"frames": frames, "sample_rate": fmt[0], "channels": fmt[1],
+            "duration": samples_total / fmt[0]}
+
+def mp3_duration(path):
+    """Exact duration from the frame count (what a decoder will actually output)."""
+    with open(path, "rb") as f:
+        return scan_mp3(f.read())["duration"]
+
+def stitch_mp3(paths, output_path):
+    """
+    Concatenates MP3 segments at the frame level: no decode, no re-encode.
+    All segments must share sample rate and channel count (true for edge-tts output).
+    Returns each segment's duration in seconds, in order. Raises ValueError otherwise.
+    """
+    if not paths:
+        raise ValueError("No segments to stitch")
+    scans = []
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        scans.append((data, scan_mp3(data)))
+
+    formats = {(s["sample_rate"], s["channels"]) for _, s in scans}
+    if len(formats) > 1:
+        raise ValueError(f"Segments have different audio formats: {sorted(formats)}")
+
+    tmp_path = output_path + ".part"
+    with open(tmp_path, "wb") as out:
+        for data, scan in scans:
+            start = scan["frames"][0][0]
+            end = scan["frames"][-1][0] + scan["frames"][-1][1]
+            out.write(data[start:end]) # frames are contiguous once tags/info frames are cut
+    os.replace(tmp_path, output_path)
+    return [scan["duration"] for _, scan in scans]
@@ -0,0 +1,85 @@
+import os
+
+PREPARED_DIR = "temp_images/prepared"
+MIN_SOURCE_SIZE = 32 # Anything smaller is a broken thumbnail/tracking pixel
+
+def prepare_overlay(img_path, target_w, output_dir=PREPARED_DIR):
+    """
+    Decodes a downloaded meme once, validates it, fixes EXIF rotation, converts to RGBA
+    and downscales it to its final on-screen width.
+    Returns (prepared_png_path, width, height) or None if the image is unusable.
+    """
+    from PIL import Image, ImageOps
+    target_w = int(target_w)
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.splitext(os.path.basename(img_path))[0]
+    out_path = os.path.join(output_dir, f"{base}_{target_w}w.png")
+
+    # Already prepared (same source, same size) -> reuse
+    if os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(img_path):
+        with Image.open(out_path) as img:
+            return out_path, img.width, img.height
+
+    try:
+        # verify() catches truncated downloads; it invalidates the handle, so reopen after
+        with Image.open(img_path) as img:
+            img.verify()
+        with Image.open(img_path) as img:
+            # Multi-megapixel JPEGs: let the decoder downscale by 2/4/8 while decoding.
+            # Square request keeps both sides >= target_w whatever the EXIF rotation.
+            if img.format == "JPEG":
+                img.draft("RGB", (target_w, target_w))
+            img = ImageOps.exif_transpose(img)
+            if img.width < MIN_SOURCE_SIZE or img.height < MIN_SOURCE_SIZE:
+                print(f"Overlay rejected (too small {img.width}x{img.height}): {img_path}")
+                return None
+
+            img = img.convert("RGBA")
+            target_h = max(1, int(round(img.height * target_w / img.width)))
+            img = img.resize((target_w, target_h), Image.LANCZOS)
+            img.save(out_path, format="PNG")
+            return out_path, target_w, target_h
+    except Exception as e:
+        print(f"Overlay rejected (unreadable image {img_path}): {e}")
+        return None
+
+def fade_ramp(duration, fps, fade):
+    """Per-frame opacity for a linear fade in + fade out (same curve as crossfadein/out)."""
+    import numpy as np
+    n_frames = int(np.ceil(duration * fps)) + 1
+    t = np.arange(n_frames) / fps
+    ramp = np.minimum(1.0, np.minimum(t / fade, np.maximum(duration - t, 0) / fade))
+    return ramp.astype(np.float32)
+
+def create_overlay_clip(overlay, fps, fade):
+    """
+    MoviePy clip for a prepared overlay: a static RGB image plus a mask that only
+    steps through the precomputed fade ramp. No per-frame resampling.
+    """
+    import numpy as np
+    from PIL import Image
+    from moviepy.editor import ImageClip, VideoClip
+
+    with Image.open(overlay["path"]) as img:
+        arr = np.asarray(img.convert("RGBA"))
+    rgb = arr[:, :, :3]
+    alpha = arr[:, :, 3].astype(np.float32) / 255.0
+
+    duration = overlay["duration"]
+    ramp = fade_ramp(duration, fps, fade)
+    masks = {} # frame index -> faded mask (only the fade frames differ from `alpha`)
+
+    def make_mask(t):
+        k = min(int(t * fps), len(ramp) - 1)
+        level = ramp[k]
+        if level >= 1.0:
+            return alpha
+        mask = masks.get(k)
+        if mask is None:
+            mask = alpha * level
+            masks[k] = mask
+        return mask
+
+    mask_clip = VideoClip(make_mask, ismask=True, duration=duration)
+    clip = ImageClip(rgb).set_duration(duration).set_mask(mask_clip)
+    return clip.set_start(overlay["start"]).set_position(("center", "center"))
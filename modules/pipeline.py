@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+_DONE = object() # End-of-stream marker passed between stages
+
+class Stage:
+    """
+    One step of the job pipeline.
+    func(job) is an async callable returning the (updated) job, or None to drop it
+    (failure -> the job goes no further). `concurrency` jobs run this stage at once.
+    """
+    def __init__(self, name, func, concurrency=1):
+        self.name = name
+        self.func = func
+        self.concurrency = max(1, int(concurrency))
+
+async def run_pipeline(jobs, stages, queue_size=2, on_complete=None):
+    """
+    Streams jobs through the stages. Bounded queues between stages let I/O stages
+    work `queue_size` jobs ahead of a slow stage (e.g. the renderer) without piling
+    up unbounded work in memory.
+    jobs: a list, or an async iterator (pulled only when the first stage has room,
+    so an endless source such as daemon mode decides when the next job starts).
+    on_complete(job): called for each finished job instead of collecting it.
+    Returns (completed_jobs, dropped_count).
+    """
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+    completed = []
+    dropped = 0
+
+    async def feed():
+        if hasattr(jobs, "__aiter__"):
+            async for job in jobs:
+                await queues[0].put(job)
+        else:
+            for job in jobs:
+                await queues[0].put(job)
+        for _ in range(stages[0].concurrency):
+            await queues[0].put(_DONE)
+
+    async def run_stage(i, stage):
+        inbox = queues[i]
+        outbox = queues[i + 1] if i + 1 < len(stages) else None
+        finished_workers = 0
+
+        async def worker():
+            nonlocal dropped, finished_workers
+            while True:
+                job = await inbox.get()
+                if job is _DONE:
+                    break
+                start = time.perf_counter()
+                try:
+                    result = await stage.func(job)
+                except Exception as e:
+                    print(f"[Pipeline] Stage '{stage.name}' failed: {e}")
+                    import traceback
+                    traceback.print_exc()
+                    result = None
+                if isinstance(result, dict):
+                    result.setdefault("stage_seconds", {})[stage.name] = round(time.perf_counter() - start, 3)
+
+                if result is None:
+                    dropped += 1
+                elif outbox is not None:
+                    await outbox.put(result)
+                elif on_complete is not None:
+                    on_complete(result)
+                else:
+                    completed.append(result)
+
+            # Last worker out tells every worker of the next stage to stop
+            finished_workers += 1
+            if finished_workers == stage.concurrency and outbox is not None:
+                for _ in range(stages[i + 1].concurrency):
+                    await outbox.put(_DONE)
+
+        await asyncio.gather(*(worker() for _ in range(stage.concurrency)))
+
+    await asyncio.gather(feed(), *(run_stage(i, stage) for i, stage in enumerate(stages)))
+    return completed, dropped
@@ -26,5 +26,14 @@ class PostHistory:
             self._save_history()
 
     def _save_history(self):
-        with open(self.history_file, 'w') as f:
+        # Several main.py processes share this file: merge in what they added since we loaded it,
+        # and replace atomically so a reader never sees a half-written file.
+        # (Duplicate protection between running workers is the work queue's job, not this file's.)
+        merged = self._load_history()
+        known = set(merged)
+        merged += [post_id for post_id in self.seen_ids if post_id not in known]
+        self.seen_ids = merged
+        tmp_path = f"{self.history_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
             json.dump({'seen_ids': self.seen_ids}, f, indent=2)
+        os.replace(tmp_path, self.history_file)
@@ -0,0 +1,164 @@
+import cProfile
+import contextlib
+import glob
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# Stage Profiling (main.py --profile [DIR])
+# Every stage records its Python stacks with a sampler thread (-> .collapsed in ms, input for flamegraph.pl / speedscope).
+# Blocking stage calls additionally run under cProfile (-> .pstats), one at a time: since Python 3.12 cProfile
+# sits on the interpreter-wide sys.monitoring and a second active profiler raises ValueError. A blocking call
+# that finds cProfile busy (another job's stage in a parallel thread) gets the sampler only.
+# Async stages (fetch, audio) sample the event loop thread while they run (profile_span).
+# Files land in DIR/<job_id>/<stage>.*. Render worker processes inherit PROFILE_ENV.
+PROFILE_ENV = "VIDEO_BOT_PROFILE_DIR"
+SAMPLE_INTERVAL = 0.005 # 200 Hz
+
+_profile_dir = os.environ.get(PROFILE_ENV) or None
+_enabled_at = 0.0
+_sampler = None
+_sampler_lock = threading.Lock()
+_cprofile_lock = threading.Lock() # One cProfile per process (see above)
+
+def enable_profiling(directory):
+    """Profiles stages in this process and every child process started afterwards."""
+    global _profile_dir, _enabled_at
+    _profile_dir = os.path.abspath(directory)
+    _enabled_at = time.time()
+    os.makedirs(_profile_dir, exist_ok=True)
+    os.environ[PROFILE_ENV] = _profile_dir
+
+def profiling_enabled():
+    return _profile_dir is not None
+
+class _StackSampler(threading.Thread):
+    """Samples the stacks of registered threads only (the ones running a profiled stage)."""
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(name="stage-profiler", daemon=True)
+        self.interval = interval
+        self.targets = {} # token -> (thread ident, Counter of collapsed stacks); async stages share the loop thread
+
+    def run(self):
+        last = time.perf_counter()
+        while True:
+            time.sleep(self.interval)
+            # Weighted by the real time since the last sample (ms): busy threads hold the GIL and delay the sampler
+            now = time.perf_counter()
+            weight, last = max(1, round((now - last) * 1000)), now
+            if not self.targets:
+                continue
+            frames = sys._current_frames()
+            for ident, counter in list(self.targets.values()):
+                frame = frames.get(ident)
+                if frame is not None:
+                    counter[_collapse(frame)] += weight
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+def _get_sampler():
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = _StackSampler()
+            _sampler.start()
+    return _sampler
+
+def _output_base(job_id, stage):
+    """DIR/<job>/<stage> (plus .2, .3... when a stage profiles several steps, e.g. a resumed job's retry)."""
+    job_dir = os.path.join(_profile_dir, str(job_id or f"pid{os.getpid()}"))
+    os.makedirs(job_dir, exist_ok=True)
+    base = os.path.join(job_dir, stage)
+    n = 1
+    while os.path.exists(base + ".collapsed"):
+        n += 1
+        base = os.path.join(job_dir, f"{stage}.{n}")
+    return base
+
+def _start_sampling():
+    """Starts sampling the calling thread; returns (token, stacks) for _stop_sampling."""
+    token, stacks = object(), Counter()
+    _get_sampler().targets[token] = (threading.get_ident(), stacks)
+    return token, stacks
+
+def _stop_sampling(token, stacks, job_id, stage):
+    """Stops sampling and writes <base>.collapsed. Returns the output base."""
+    _get_sampler().targets.pop(token, None)
+    base = _output_base(job_id, stage)
+    with open(base + ".collapsed", "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    return base
+
+@contextlib.contextmanager
+def profile_span(job_id, stage):
+    """
+    Sampler-only profile of an async stage: the event loop thread's stacks while the stage runs.
+    Other jobs' coroutines on the same loop show up too, so read it as a wall-clock view of the loop.
+    """
+    if _profile_dir is None:
+        yield
+        return
+    token, stacks = _start_sampling()
+    try:
+        yield
+    finally:
+        _stop_sampling(token, stacks, job_id, stage)
+
+def run_profiled(job_id, stage, func, /, *args, **kwargs):
+    """Calls func(*args, **kwargs); when profiling is on, records its profile for (job, stage)."""
+    if _profile_dir is None:
+        return func(*args, **kwargs)
+
+    profiler = None
+    if _cprofile_lock.acquire(blocking=False):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError: # Another tool (debugger, coverage) already holds sys.monitoring
+            profiler = None
+            _cprofile_lock.release()
+    token, stacks = _start_sampling()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        if profiler:
+            profiler.disable()
+            _cprofile_lock.release()
+        base = _stop_sampling(token, stacks, job_id, stage)
+        if profiler:
+            profiler.dump_stats(base + ".pstats")
+
+def print_profile_summary(directory=None, top_n=20):
+    """Time per stage (from the sampled stacks, which every stage has) plus the top-N functions by own time."""
+    directory = directory or _profile_dir
+    # Only this batch's profiles (the directory keeps earlier runs)
+    def batch_files(ext):
+        return sorted(f for f in glob.glob(os.path.join(directory, "*", "*" + ext)) if os.path.getmtime(f) >= _enabled_at)
+    sampled, files = batch_files(".collapsed"), batch_files(".pstats")
+    if not sampled:
+        print("Profile: no stages were profiled.")
+        return
+
+    per_stage = Counter()
+    for path in sampled:
+        stage = os.path.basename(path).split(".")[0]
+        with open(path, encoding="utf-8") as f:
+            per_stage[stage] += sum(int(line.rsplit(" ", 1)[1]) for line in f if line.strip()) / 1000
+
+    print(f"\n--- Profile Summary ({len(sampled)} sampled / {len(files)} cProfile stage profiles in {directory}) ---")
+    print("Time per stage (sampled seconds): " +
+          ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in per_stage.most_common()))
+    if files:
+        stats = pstats.Stats(*files)
+        stats.sort_stats("tottime").print_stats(top_n)
+    print(f"Flamegraphs: flamegraph.pl {directory}/<job>/<stage>.collapsed > out.svg (or load in speedscope.app)")
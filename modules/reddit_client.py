@@ -1,20 +1,170 @@
+import asyncio
 import requests
 import random
 import html
+import threading
+import time
+from collections import Counter, OrderedDict
+from requests.adapters import HTTPAdapter
+from modules.tracing import span
+
+# HTTP: one keep-alive session (no DNS/TCP/TLS per listing), conditional GETs for listings
+# fetched before (304 -> reuse the filtered posts), and pacing from Reddit's x-ratelimit-* headers.
+POOL_SIZE = 4              # Max open connections to reddit.com (extra threads wait for a free one)
+REQUEST_TIMEOUT = 15
+MAX_RETRIES = 4            # On 429 / 5xx / connection errors
+MAX_BACKOFF_S = 60
+MIN_REMAINING = 2          # Wait for the rate-limit window to reset when fewer requests are left
+MAX_PAGE_SIZE = 100        # Reddit's cap on `limit` per listing page
+SORTS = ["top", "controversial", "best"]
+
+class AsyncRateLimiter:
+    """Spaces calls at least 60/requests_per_minute seconds apart across every task sharing it."""
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
 
 class RedditClient:
-    def __init__(self, subreddits=None):
+    def __init__(self, subreddits=None, pool_size=POOL_SIZE, listing_cache_size=None):
         self.subreddits = subreddits or ["confession", "AmItheAsshole", "tifu", "AskReddit"]
         self.default_subreddit = "confession" # Default fallback
         self.headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
 
-    def get_top_posts(self, subreddit=None, time_filter="day", limit=25, sort="best"):
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # pool_block: threads beyond pool_size wait for a connection instead of opening throwaway ones
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True))
+        # url -> (etag, last_modified, (posts, after)) for If-None-Match / If-Modified-Since.
+        # Filtered posts only (not the raw JSON); one entry per listing a fan-out asks for.
+        self._listings = OrderedDict()
+        self.listing_cache_size = listing_cache_size or len(self.subreddits) * len(SORTS)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0 # Shared by all threads: set by rate-limit headers and 429s
+        self.stats = Counter() # requests, not_modified, bytes, retries, rate_limit_waits
+
+    def _wait_for_rate_limit(self):
+        with self._lock:
+            delay = self._paused_until - time.time()
+            if delay > 0:
+                self.stats["rate_limit_waits"] += 1
+        if delay > 0:
+            print(f"Reddit rate limit: waiting {delay:.1f}s for the window to reset...")
+            time.sleep(delay)
+
+    def _update_rate_limit(self, response):
+        """x-ratelimit-remaining / -reset (seconds): pause everyone before the window runs dry."""
+        try:
+            remaining = float(response.headers["x-ratelimit-remaining"])
+            reset_s = float(response.headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            return
+        if remaining < MIN_REMAINING:
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.time() + reset_s)
+
+    def _backoff(self, response, attempt):
+        """Seconds to wait before retrying: Retry-After / rate-limit reset if given, else exponential with jitter."""
+        delay = None
+        if response is not None:
+            for header in ("retry-after", "x-ratelimit-reset"):
+                try:
+                    delay = float(response.headers[header])
+                    break
+                except (KeyError, ValueError):
+                    continue
+        if delay is None:
+            delay = 2 ** attempt + random.uniform(0, 1)
+        delay = min(delay, MAX_BACKOFF_S)
+        if response is not None and response.status_code == 429:
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.time() + delay)
+        return delay
+
+    def _remember(self, url, response, page):
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._listings[url] = (etag, last_modified, page)
+            self._listings.move_to_end(url)
+            while len(self._listings) > self.listing_cache_size:
+                self._listings.popitem(last=False)
+
+    def _parse_listing(self, data, subreddit):
+        """(filtered posts, after cursor) of a listing response."""
+        # Subreddit might return empty children if invalid, but usually status 200
+        listing = data.get('data', {})
+        posts = [self._filter_post(child['data'], subreddit) for child in listing.get('children', [])]
+        return [post for post in posts if post], listing.get('after')
+
+    def _get_listing(self, url, subreddit, sort, cache=True):
         """
-        Fetches a list of posts, sorted by 'best', 'hot', 'top', or 'controversial'.
+        One listing page (conditional GET, paced, retried). Returns (filtered posts, after cursor) or None.
+        cache=False: don't remember the page (cursor pages of a backfill are never asked for twice).
         """
-        if not subreddit:
-            subreddit = random.choice(self.subreddits)
-        
+        with self._lock:
+            cached = self._listings.get(url) if cache else None
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        for attempt in range(MAX_RETRIES + 1):
+            self._wait_for_rate_limit()
+            response = None
+            try:
+                with span("reddit.request", subreddit=subreddit, sort=sort, attempt=attempt + 1) as sp:
+                    response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+                    sp.set(status=response.status_code, bytes=len(response.content))
+            except requests.RequestException as e:
+                error = e
+            else:
+                error = None
+                self._update_rate_limit(response)
+                with self._lock:
+                    self.stats["requests"] += 1
+                    self.stats["bytes"] += len(response.content)
+
+                if response.status_code == 304 and cached:
+                    with self._lock:
+                        self.stats["not_modified"] += 1
+                    return cached[2]
+                if response.status_code == 200:
+                    page = self._parse_listing(response.json(), subreddit)
+                    if cache:
+                        self._remember(url, response, page)
+                    return page
+                if response.status_code != 429 and response.status_code < 500:
+                    # 403/404: private, banned or misspelled subreddit. Retrying won't help.
+                    print(f"Error fetching from Reddit ({subreddit}): {response.status_code}")
+                    return None
+
+            if attempt == MAX_RETRIES:
+                break
+            delay = self._backoff(response, attempt)
+            reason = error or f"HTTP {response.status_code}"
+            print(f"Reddit request failed ({subreddit}: {reason}). Retrying in {delay:.1f}s ({attempt + 1}/{MAX_RETRIES})...")
+            with self._lock:
+                self.stats["retries"] += 1
+            time.sleep(delay)
+
+        print(f"Error fetching from Reddit ({subreddit}): giving up after {MAX_RETRIES + 1} attempts")
+        return None
+
+    def _listing_url(self, subreddit, sort, time_filter, limit, after=None):
+        """Returns (url, endpoint) for a subreddit listing page."""
         # Determine the endpoint based on sort strategy
         if sort == "best":
             # 'best' is usually for home feed, for subreddits 'hot' is default 'best' equivalent or 'top'
@@ -27,56 +177,160 @@ class RedditClient:
             endpoint = "top" # Default to top
 
         url = f"https://www.reddit.com/r/{subreddit}/{endpoint}.json?t={time_filter}&limit={limit}"
+        if after:
+            url += f"&after={after}"
+        return url, endpoint
+
+    def _filter_post(self, p_data, subreddit):
+        """Post dict for a listing child, or None if it's unusable for a story video."""
+        # Basic Filtering
+        if p_data.get('over_18'): return None
+        if p_data.get('is_video'): return None # Skip videos, we want text
+        if p_data.get('stickied'): return None
+        
+        # Text length filter
+        # Combine title and body for the script source
+        full_text = p_data.get('title', '') + "\n" + p_data.get('selftext', '')
+        
+        # Filter out likely empty/media-only posts
+        if not p_data.get('selftext') and not p_data.get('title'): 
+            return None
+        
+        # Relaxed length check (20 chars min, 10000 max)
+        if len(full_text) < 20 or len(full_text) > 10000:
+            return None
+        
+        return {
+            'subreddit': subreddit,
+            'id': p_data['id'],
+            'title': html.unescape(p_data['title']),
+            'text': html.unescape(p_data.get('selftext', '')), # Keep original separation
+            'url': p_data['url'],
+            'author': p_data['author'],
+            # Engagement, for candidate scoring
+            'score': p_data.get('score', 0),
+            'num_comments': p_data.get('num_comments', 0),
+            'upvote_ratio': p_data.get('upvote_ratio'),
+        }
+
+    def get_top_posts(self, subreddit=None, time_filter="day", limit=25, sort="best"):
+        """
+        Fetches a list of posts, sorted by 'best', 'hot', 'top', or 'controversial'.
+        """
+        if not subreddit:
+            subreddit = random.choice(self.subreddits)
+        return self._fetch_posts(subreddit, time_filter, limit, sort) or []
+
+    def _fetch_posts(self, subreddit, time_filter, limit, sort):
+        """Filtered posts of one listing; None if the fetch failed ([] = Reddit answered with nothing usable)."""
+        url, endpoint = self._listing_url(subreddit, sort, time_filter, limit)
         
         try:
-            response = requests.get(url, headers=self.headers)
-            if response.status_code != 200:
-                print(f"Error fetching from Reddit ({subreddit}): {response.status_code}")
-                return []
-                
-            data = response.json()
-            posts = []
-            
-            # Subreddit might return empty children if invalid, but usually status 200
-            children = data.get('data', {}).get('children', [])
-            
-            for child in children:
-                p_data = child['data']
-                
-                # Basic Filtering
-                if p_data.get('over_18'): continue
-                if p_data.get('is_video'): continue # Skip videos, we want text
-                if p_data.get('stickied'): continue
-                
-                # Text length filter
-                # Combine title and body for the script source
-                full_text = p_data.get('title', '') + "\n" + p_data.get('selftext', '')
-                
-                # Filter out likely empty/media-only posts
-                if not p_data.get('selftext') and not p_data.get('title'): 
-                    # print(f"Skipped {p_data['id']}: Empty")
-                    continue
-                
-                # Relaxed length check (20 chars min, 10000 max)
-                if len(full_text) < 20 or len(full_text) > 10000:
-                    # print(f"Skipped {p_data['id']}: Length {len(full_text)}")
-                    continue
-                
-                posts.append({
-                    'subreddit': subreddit,
-                    'id': p_data['id'],
-                    'title': html.unescape(p_data['title']),
-                    'text': html.unescape(p_data.get('selftext', '')), # Keep original separation
-                    'url': p_data['url'],
-                    'author': p_data['author']
-                })
-
-                
-            return posts
+            page = self._get_listing(url, subreddit, endpoint)
+            if page is None:
+                return None
+            posts, _ = page
+            return list(posts) # The cached page stays untouched
             
         except Exception as e:
             print(f"Reddit Client Error: {e}")
-            return []
+            return None
+
+    def iter_posts(self, subreddit=None, time_filter="day", sort="top", max_posts=None, page_size=MAX_PAGE_SIZE, max_pages=None):
+        """
+        Streams filtered posts across pages, following Reddit's `after` cursor.
+        Lazy: the next page is only requested once the caller has consumed the current one,
+        so breaking out early (or max_posts accepted posts) never fetches pages that won't be used.
+        Holds one page at a time, so deep week/month/all backfills run in constant memory.
+        Stops at max_posts, max_pages, the end of the listing, or a failed page.
+        """
+        subreddit = subreddit or random.choice(self.subreddits)
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        after = None
+        yielded = 0
+        pages = 0
+        while max_pages is None or pages < max_pages:
+            url, endpoint = self._listing_url(subreddit, sort, time_filter, page_size, after=after)
+            # Only the first page is worth a conditional GET; cursor pages shift as votes change
+            page = self._get_listing(url, subreddit, endpoint, cache=after is None)
+            pages += 1
+            if page is None:
+                return
+            posts, after = page
+            for post in posts:
+                yield post
+                yielded += 1
+                if max_posts is not None and yielded >= max_posts:
+                    return
+            if not after:
+                return # End of the listing
+
+    def pick_listings(self, subreddits=None, sorts=SORTS, sorts_per_subreddit=1):
+        """(subreddit, sort) pairs for a fan-out: every subreddit with `sorts_per_subreddit` random sorts."""
+        subreddits = list(subreddits or self.subreddits)
+        return [(sub, sort) for sub in subreddits
+                for sort in random.sample(sorts, min(sorts_per_subreddit, len(sorts)))]
+
+    async def fetch_listings(self, listings, time_filter="day", limit=75, concurrency=POOL_SIZE, requests_per_minute=100):
+        """
+        Fan-out: fetches many (subreddit, sort) listings at once. `concurrency` requests run at once
+        (threads on the pooled session), started no faster than `requests_per_minute`; the
+        x-ratelimit-* pacing of get_top_posts still applies on top.
+        Returns {(subreddit, sort): posts} for the listings Reddit answered; failed fetches are left out.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        limiter = AsyncRateLimiter(requests_per_minute)
+
+        async def fetch(sub, sort):
+            async with semaphore:
+                await limiter.wait()
+                return await asyncio.to_thread(self._fetch_posts, sub, time_filter, limit, sort)
+
+        with span("reddit.fanout", listings=len(listings), concurrency=concurrency) as sp:
+            results = await asyncio.gather(*(fetch(sub, sort) for sub, sort in listings), return_exceptions=True)
+            fetched = {listing: posts for listing, posts in zip(listings, results)
+                       if posts is not None and not isinstance(posts, BaseException)}
+            sp.set(fetched=len(fetched), failed=len(listings) - len(fetched),
+                   empty=sum(1 for posts in fetched.values() if not posts))
+        return fetched
+
+    async def fetch_candidates(self, subreddits=None, sorts=SORTS, sorts_per_subreddit=1, **fetch_kwargs):
+        """
+        One fan-out across the subreddits merged into a single candidate list,
+        deduplicated by post id and shuffled (no subreddit/sort gets picked first every time).
+        """
+        listings = self.pick_listings(subreddits, sorts, sorts_per_subreddit)
+        fetched = await self.fetch_listings(listings, **fetch_kwargs)
+        pool = {}
+        for posts in fetched.values():
+            for post in posts:
+                pool.setdefault(post['id'], post)
+        candidates = list(pool.values())
+        random.shuffle(candidates)
+        failed = len(listings) - sum(1 for posts in fetched.values() if posts)
+        print(f"Reddit fan-out: {len(listings)} listings -> {len(candidates)} unique candidates ({failed} empty/failed)")
+        return candidates
+
+    async def refill_pool(self, pool, subreddits=None, sorts=SORTS, sorts_per_subreddit=1, time_filter="day", **fetch_kwargs):
+        """
+        Fan-out into a CandidatePool, skipping listings it fetched within its TTL.
+        Returns the number of listings fetched (0 = everything on disk is still fresh).
+        """
+        removed = await asyncio.to_thread(pool.prune)
+        listings = await asyncio.to_thread(
+            pool.stale_listings, self.pick_listings(subreddits, sorts, sorts_per_subreddit), time_filter)
+        if not listings:
+            print(f"Candidate pool: every listing is fresh (TTL {pool.listing_ttl}s); nothing to fetch.")
+            return 0
+        fetched = await self.fetch_listings(listings, time_filter=time_filter, **fetch_kwargs)
+        for (sub, sort), posts in fetched.items():
+            # Only listings Reddit answered (empty ones too: a quiet subreddit isn't asked again until its TTL
+            # runs out). Failed fetches stay stale, so the next refill retries them instead of trusting an outage.
+            await asyncio.to_thread(pool.add_listing, sub, sort, time_filter, posts)
+        available, rejected = await asyncio.to_thread(lambda: (pool.available(), pool.rejected()))
+        print(f"Candidate pool: fetched {len(fetched)}/{len(listings)} stale listings, dropped {removed} expired "
+              f"candidates -> {available} unused ({rejected} screened out)")
+        return len(fetched)
 
     def get_top_post(self, subreddit=None, time_filter="day"):
         """
@@ -0,0 +1,79 @@
+# Render Quality Profiles
+# Each profile picks resolution, fps, encoder settings and extras together.
+#   draft:    half resolution, 15fps, ultrafast, no BGM -> review script & timing in seconds
+#   standard: full resolution, faster encode, slightly larger files
+#   final:    what we publish (identical to the historical hardcoded settings)
+RENDER_PROFILES = {
+    "draft": {
+        "width": 540,
+        "height": 960,
+        "fps": 15,
+        "codec": "libx264",
+        "preset": "ultrafast",
+        "crf": 30,
+        "threads": None, # None -> let x264 use every core
+        "audio_bitrate": "96k",
+        "bgm": False,
+    },
+    "standard": {
+        "width": 1080,
+        "height": 1920,
+        "fps": 30,
+        "codec": "libx264",
+        "preset": "veryfast",
+        "crf": 23,
+        "threads": None,
+        "audio_bitrate": None,
+        "bgm": True,
+    },
+    "final": {
+        "width": 1080,
+        "height": 1920,
+        "fps": 30,
+        "codec": "libx264",
+        "preset": "medium",
+        "crf": None, # x264 default
+        "threads": None,
+        "audio_bitrate": None,
+        "bgm": True,
+    },
+}
+
+DEFAULT_PROFILE = "final"
+
+def get_render_profile(name=None):
+    """Returns a copy of the named profile (callers may tweak e.g. threads)."""
+    name = name or DEFAULT_PROFILE
+    if name not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile '{name}' (expected one of {list(RENDER_PROFILES)})")
+    profile = dict(RENDER_PROFILES[name])
+    profile["name"] = name
+    return profile
+
+def x264_ffmpeg_args(profile):
+    """Encoder arguments for a raw ffmpeg command line."""
+    args = ["-c:v", profile["codec"], "-preset", profile["preset"], "-pix_fmt", "yuv420p"]
+    if profile.get("crf") is not None:
+        args += ["-crf", str(profile["crf"])]
+    if profile.get("threads"):
+        args += ["-threads", str(profile["threads"])]
+    return args
+
+def moviepy_write_kwargs(profile, extra_ffmpeg_params=None):
+    """Encoder keyword arguments for MoviePy's write_videofile."""
+    ffmpeg_params = ['-pix_fmt', 'yuv420p']
+    if profile.get("crf") is not None:
+        ffmpeg_params += ['-crf', str(profile["crf"])]
+    ffmpeg_params += list(extra_ffmpeg_params or [])
+
+    kwargs = {
+        "codec": profile["codec"],
+        "fps": profile["fps"],
+        "preset": profile["preset"],
+        "ffmpeg_params": ffmpeg_params,
+    }
+    if profile.get("threads"):
+        kwargs["threads"] = profile["threads"]
+    if profile.get("audio_bitrate"):
+        kwargs["audio_bitrate"] = profile["audio_bitrate"]
+    return kwargs
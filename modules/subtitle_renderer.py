@@ -1,8 +1,8 @@
-from PIL import Image, ImageDraw, ImageFont
-from moviepy.editor import ImageClip, CompositeVideoClip
-import numpy as np
 import re
 import os
+from bisect import bisect_right
+from functools import lru_cache
+from modules.caption_cache import get_caption_cache
 
 def parse_vtt(vtt_path):
     """
@@ -37,21 +37,59 @@ def parse_vtt(vtt_path):
                     subs.append((current_start, current_end, text))
     return subs
 
-def create_caption_clip(text, duration, video_w, video_h, font_path=None):
+# Caption Style (shared by the MoviePy and ffmpeg backends)
+CAPTION_FONTSIZE = 70 # Reduced to 70 as requested
+CAPTION_STROKE_WIDTH = 6 # Slightly thinner stroke for smaller font
+CAPTION_TEXT_COLOR = "yellow"
+CAPTION_STROKE_COLOR = "black"
+CAPTION_PADDING = 50
+CAPTION_Y_RATIO = 0.6 # Top edge of the caption, relative to video height
+
+def pop_scale(t):
     """
-    Creates a transparent ImageClip with popped text using PIL.
+    "Pop" Effect (Resize from 0.5 to 1.2 then 1.0), t relative to word start.
+    """
+    if t < 0.1:
+        return 0.5 + (0.7 * (t / 0.1)) # 0.5 -> 1.2
+    elif t < 0.2:
+        return 1.2 - (0.2 * ((t - 0.1) / 0.1)) # 1.2 -> 1.0
+    else:
+        return 1.0
+
+def patch_pillow_for_moviepy():
+    """MoviePy 1.0.3's resize() still uses PIL.Image.ANTIALIAS (removed in Pillow 10)."""
+    from PIL import Image
+    if not hasattr(Image, 'ANTIALIAS'):
+        Image.ANTIALIAS = Image.LANCZOS
+
+@lru_cache(maxsize=16)
+def _load_font(font_path, fontsize):
+    from PIL import ImageFont
+    return ImageFont.truetype(font_path, fontsize)
+
+def render_caption_image(text, font_path=None, scale=1.0):
+    """
+    Draws a single word card (yellow text, black stroke) as a PIL RGBA image.
+    scale: relative to the full-resolution style (e.g. 0.5 for draft renders).
+    Cards are shared through the caption cache, so treat the result as read-only.
     """
-    # Settings
-    fontsize = 70 # Reduced to 70 as requested
-    stroke_width = 6 # Slightly thinner stroke for smaller font
-    text_color = "yellow"
-    stroke_color = "black"
-    
     if not font_path or not os.path.exists(font_path):
         # Fallback to absolute path just in case
         font_path = os.path.abspath("assets/fonts/KomikaAxis.ttf")
     
-    font = ImageFont.truetype(font_path, fontsize)
+    fontsize = max(1, int(round(CAPTION_FONTSIZE * scale)))
+    stroke_width = max(1, int(round(CAPTION_STROKE_WIDTH * scale)))
+    padding = int(round(CAPTION_PADDING * scale))
+    
+    cache = get_caption_cache()
+    key = cache.make_key(text, font_path, fontsize, stroke_width,
+                         CAPTION_TEXT_COLOR, CAPTION_STROKE_COLOR)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    
+    from PIL import Image, ImageDraw
+    font = _load_font(font_path, fontsize)
     
     # Measure text size
     dummy_img = Image.new("RGBA", (1, 1))
@@ -66,13 +104,24 @@ def create_caption_clip(text, duration, video_w, video_h, font_path=None):
         text_w, text_h = draw.textsize(text, font=font, stroke_width=stroke_width)
     
     # Add GENEROUS padding to prevent cutoff
-    w, h = text_w + 100, text_h + 100
+    w, h = text_w + 2 * padding, text_h + 2 * padding
     
     img = Image.new("RGBA", (int(w), int(h)), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
     
     # Draw text centered in the image
-    draw.text((50, 50), text, font=font, fill=text_color, stroke_fill=stroke_color, stroke_width=stroke_width)
+    draw.text((padding, padding), text, font=font, fill=CAPTION_TEXT_COLOR,
+              stroke_fill=CAPTION_STROKE_COLOR, stroke_width=stroke_width)
+    return cache.put(key, img)
+
+def create_caption_clip(text, duration, video_w, video_h, font_path=None):
+    """
+    Creates a transparent ImageClip with popped text using PIL.
+    """
+    import numpy as np
+    from moviepy.editor import ImageClip
+    patch_pillow_for_moviepy()
+    img = render_caption_image(text, font_path)
     
     # Create ImageClip
     img_array = np.array(img)
@@ -85,35 +134,24 @@ def create_caption_clip(text, duration, video_w, video_h, font_path=None):
     mask_clip = ImageClip(alpha_array, ismask=True).set_duration(duration)
     
     # Center horizontally, 60% down vertically
-    txt_clip = txt_clip.set_position(('center', video_h * 0.6))
+    txt_clip = txt_clip.set_position(('center', video_h * CAPTION_Y_RATIO))
     
-    # "Pop" Effect (Resize from 0.5 to 1.2 then 1.0)
-    # Using MoviePy 1.x logic (resize accepts function)
-    def resize_func(t):
-        if t < 0.1:
-            return 0.5 + (0.7 * (t / 0.1)) # 0.5 -> 1.2
-        elif t < 0.2:
-            return 1.2 - (0.2 * ((t - 0.1) / 0.1)) # 1.2 -> 1.0
-        else:
-            return 1.0
-            
     # Apply resize to BOTH clip and mask to ensure they stay synced
-    txt_clip = txt_clip.resize(resize_func)
-    mask_clip = mask_clip.resize(resize_func)
+    # Using MoviePy 1.x logic (resize accepts function)
+    txt_clip = txt_clip.resize(pop_scale)
+    mask_clip = mask_clip.resize(pop_scale)
     
     # Re-apply the mask to the resized clip
     txt_clip.mask = mask_clip
     
     return txt_clip
 
-def add_subtitles(video_clip, data_path, font_path="arial.ttf", return_clips=False):
+def load_word_timings(data_path):
     """
-    Overlays subtitles onto the video_clip.
-    data_path: Path to either .vtt or .json (word timestamps).
-    return_clips: If True, returns the list of text clips instead of a CompositeVideoClip.
+    Reads word timings from either .json (Perfect Sync) or .vtt (character-based estimate).
+    Returns list of (word, start_seconds, duration_seconds).
     """
-    subtitle_clips = []
-    w, h = video_clip.size
+    timings = []
     
     # Check if JSON (Perfect Sync)
     if data_path.endswith(".json"):
@@ -132,9 +170,7 @@ def add_subtitles(video_clip, data_path, font_path="arial.ttf", return_clips=Fal
             # Min duration for visibility
             if duration < 0.15: duration = 0.15
             
-            txt_clip = create_caption_clip(word, duration, w, h, font_path)
-            txt_clip = txt_clip.set_start(start)
-            subtitle_clips.append(txt_clip)
+            timings.append((word, start, duration))
             
     else:
         # Fallback to VTT (Approximate)
@@ -158,10 +194,113 @@ def add_subtitles(video_clip, data_path, font_path="arial.ttf", return_clips=Fal
                 word_duration = word_len * duration_per_char
                 if word_duration < 0.1: pass
 
-                txt_clip = create_caption_clip(word, word_duration, w, h, font_path)
-                txt_clip = txt_clip.set_start(current_time)
-                subtitle_clips.append(txt_clip)
+                timings.append((word, current_time, word_duration))
                 current_time += word_duration
+    
+    return timings
+
+class SubtitleTrack:
+    """
+    Single-layer subtitle track.
+    Instead of one masked ImageClip per word (which CompositeVideoClip walks every frame),
+    the active word for time t is found in a sorted interval index and only that card
+    is alpha-blended into the frame with numpy. Per-frame cost is flat in script length.
+    """
+    def __init__(self, timings, video_w, video_h, font_path=None, fps=30, scale=1.0):
+        self.video_w = video_w
+        self.video_h = video_h
+        self.font_path = font_path
+        self.fps = fps
+        self.scale = scale
+        self.y = int(video_h * CAPTION_Y_RATIO)
+
+        # Sorted interval index: (start, end, word). Later words win on overlap, as on the old layer stack.
+        entries = sorted(((start, start + duration, word) for word, start, duration in timings if duration > 0),
+                         key=lambda e: e[0])
+        self.starts = [e[0] for e in entries]
+        self.entries = entries
+
+        # Pop animation lasts 0.2s -> a handful of precomputed scale steps per word
+        self.pop_frames = int(round(0.2 * fps))
+        self._cards = {}
+        import numpy
+        self._np = numpy # Bound once here (module import stays light), not per frame in blend()
+
+    def _card(self, word, step):
+        """(rgb, alpha) float32 arrays for a word at pop step (step == pop_frames -> full size)."""
+        key = (word, step)
+        card = self._cards.get(key)
+        if card is None:
+            np = self._np
+            from PIL import Image
+            img = render_caption_image(word, self.font_path, scale=self.scale)
+            scale = pop_scale(step / self.fps)
+            if scale != 1.0:
+                new_size = (max(1, int(round(img.width * scale))), max(1, int(round(img.height * scale))))
+                img = img.resize(new_size, Image.LANCZOS)
+            arr = np.asarray(img, dtype=np.float32)
+            card = (arr[:, :, :3], arr[:, :, 3:] / 255.0)
+            self._cards[key] = card
+        return card
+
+    def active_word(self, t):
+        """Returns (word, start) of the word on screen at t, or None."""
+        i = bisect_right(self.starts, t) - 1
+        if i < 0:
+            return None
+        start, end, word = self.entries[i]
+        if t >= end:
+            return None
+        return word, start
+
+    def blend(self, frame, t):
+        active = self.active_word(t)
+        if active is None:
+            return frame
+        word, start = active
+
+        step = min(int((t - start) * self.fps), self.pop_frames)
+        rgb, alpha = self._card(word, step)
+        card_h, card_w = alpha.shape[:2]
+        frame_h, frame_w = frame.shape[:2]
+
+        # Center horizontally, fixed top edge; clip the card to the frame
+        x = (frame_w - card_w) // 2
+        x0, x1 = max(x, 0), min(x + card_w, frame_w)
+        y0, y1 = max(self.y, 0), min(self.y + card_h, frame_h)
+        if x0 >= x1 or y0 >= y1:
+            return frame
+        cx0, cy0 = x0 - x, y0 - self.y
+        rgb = rgb[cy0:cy0 + (y1 - y0), cx0:cx0 + (x1 - x0)]
+        alpha = alpha[cy0:cy0 + (y1 - y0), cx0:cx0 + (x1 - x0)]
+
+        np = self._np
+        out = frame.copy()
+        region = out[y0:y1, x0:x1].astype(np.float32)
+        out[y0:y1, x0:x1] = (region + (rgb - region) * alpha).astype(np.uint8)
+        return out
+
+    def apply(self, clip):
+        """Returns clip with the subtitle track burned in."""
+        return clip.fl(lambda gf, t: self.blend(gf(t), t))
+
+def add_subtitles(video_clip, data_path, font_path="arial.ttf", return_clips=False):
+    """
+    Overlays subtitles onto the video_clip.
+    data_path: Path to either .vtt or .json (word timestamps).
+    return_clips: If True, returns the list of text clips instead of a CompositeVideoClip.
+    """
+    from moviepy.editor import CompositeVideoClip
+
+    subtitle_clips = []
+    w, h = video_clip.size
+    
+    for word, start, duration in load_word_timings(data_path):
+        txt_clip = create_caption_clip(word, duration, w, h, font_path)
+        txt_clip = txt_clip.set_start(start)
+        subtitle_clips.append(txt_clip)
+    
+    print(f"Caption cache: {get_caption_cache().stats()}")
         
     if return_clips:
         return subtitle_clips
@@ -0,0 +1,19 @@
+import time
+from contextlib import contextmanager
+from modules.tracing import span
+
+@contextmanager
+def timed(timings, name):
+    """
+    Adds the wall time of the block to timings[name] (seconds) and records it as a
+    "video.<name>" trace span. timings may be None (span only).
+    """
+    with span(f"video.{name}"):
+        if timings is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
@@ -0,0 +1,138 @@
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Span Tracing (main.py --trace FILE)
+# Spans are appended to a JSONL file as they finish; export_chrome_trace() turns that file
+# into Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev).
+# Disabled: span() returns a shared no-op context manager (one global check per call).
+# Render worker processes inherit TRACE_ENV through the environment and append to the same file.
+TRACE_ENV = "VIDEO_BOT_TRACE_FILE"
+
+_trace_path = os.environ.get(TRACE_ENV) or None
+_write_lock = threading.Lock()
+_ids = itertools.count(1)
+_current_job = contextvars.ContextVar("trace_job", default=None)
+_current_span = contextvars.ContextVar("trace_span", default=None)
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+    def set(self, **attrs):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Attach attributes discovered inside the span (e.g. cache hit, result size)."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.id = f"{os.getpid()}-{next(_ids)}"
+        self.parent = _current_span.get()
+        self._token = _current_span.set(self.id)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._t0
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        _write({
+            "name": self.name,
+            "id": self.id,
+            "parent": self.parent,
+            "job": _current_job.get(),
+            "start": self.start,
+            "dur": duration,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "thread": threading.current_thread().name,
+            "attrs": self.attrs,
+        })
+        return False
+
+def _write(record):
+    line = json.dumps(record, default=str) + "\n"
+    with _write_lock:
+        # One short append per span: safe to share the file between processes
+        with open(_trace_path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+def enable_tracing(path):
+    """Starts recording spans to `path` (JSONL) in this process and every child process started afterwards."""
+    global _trace_path
+    _trace_path = os.path.abspath(path)
+    os.makedirs(os.path.dirname(_trace_path) or ".", exist_ok=True)
+    open(_trace_path, "w").close()
+    os.environ[TRACE_ENV] = _trace_path
+
+def tracing_enabled():
+    return _trace_path is not None
+
+def span(name, **attrs):
+    """with span("tts.segment", voice=v): ...  -- records wall time, job id and attributes."""
+    if _trace_path is None:
+        return _NULL_SPAN
+    return _Span(name, attrs)
+
+@contextmanager
+def job_context(job_id):
+    """Tags every span in this block (including asyncio.to_thread calls made from it) with a job id."""
+    token = _current_job.set(job_id)
+    try:
+        yield
+    finally:
+        _current_job.reset(token)
+
+def set_job(job_id):
+    """Tags spans of the current context with a job id (e.g. inside a render worker)."""
+    _current_job.set(job_id)
+
+def export_chrome_trace(jsonl_path, output_path):
+    """
+    Converts recorded spans to Chrome trace-event JSON. Each job gets its own row
+    (per process), so overlapping pipeline stages of different videos are easy to see.
+    """
+    events = []
+    rows = {}
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    for rec in records:
+        row_key = (rec["pid"], rec["job"] or rec["thread"])
+        if row_key not in rows:
+            rows[row_key] = len(rows) + 1
+            label = f"job {rec['job']}" if rec["job"] else rec["thread"]
+            events.append({"name": "thread_name", "ph": "M", "pid": rec["pid"], "tid": rows[row_key],
+                           "args": {"name": label}})
+        args = dict(rec["attrs"])
+        if rec["job"]:
+            args["job"] = rec["job"]
+        events.append({
+            "name": rec["name"],
+            "cat": rec["name"].split(".")[0],
+            "ph": "X",
+            "ts": rec["start"] * 1e6,
+            "dur": rec["dur"] * 1e6,
+            "pid": rec["pid"],
+            "tid": rows[row_key],
+            "args": args,
+        })
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return output_path
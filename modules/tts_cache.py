@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+CACHE_VERSION = 1 # Bump if the stored boundary format changes
+
+def normalize_tts_text(text):
+    """Whitespace-insensitive form of a segment, so 'WHAT?! ' and 'WHAT?!' share an entry."""
+    return " ".join(text.split())
+
+class TTSCache:
+    """
+    Persistent content-addressed store of synthesized segments: the MP3 bytes plus
+    the word boundaries [(word, start_s, duration_s)] relative to the segment start.
+    Keyed by normalized text + voice + TTS settings. Bounded on disk; least recently
+    used entries (by file mtime, refreshed on every hit) are evicted first.
+    """
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.current_bytes = sum(size for _, _, size in self._entries())
+
+    @staticmethod
+    def make_key(text, voice, rate="+0%", volume="+0%", pitch="+0Hz"):
+        raw = json.dumps([CACHE_VERSION, normalize_tts_text(text), voice, rate, volume, pitch])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".mp3", base + ".json"
+
+    def _entries(self):
+        """(key, mtime, bytes) for every complete entry on disk."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-5]
+            audio_path, meta_path = self._paths(key)
+            try:
+                size = os.path.getsize(audio_path) + os.path.getsize(meta_path)
+                entries.append((key, os.path.getmtime(meta_path), size))
+            except OSError:
+                continue # Half-written or half-evicted entry
+        return entries
+
+    def get(self, key, output_path):
+        """Copies the cached audio to output_path and returns its boundaries, or None on a miss."""
+        audio_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                boundaries = [tuple(b) for b in json.load(f)["boundaries"]]
+            shutil.copyfile(audio_path, output_path)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+
+        # Mark as recently used
+        try:
+            os.utime(meta_path, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return boundaries
+
+    def put(self, key, audio_file, boundaries):
+        """Stores a freshly synthesized segment (audio first, metadata last = commit marker)."""
+        audio_path, meta_path = self._paths(key)
+        size = os.path.getsize(audio_file)
+        if size > self.max_bytes:
+            return
+
+        # Write-then-rename so concurrent workers never read a partial entry
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            shutil.copyfile(audio_file, audio_path + suffix)
+            os.replace(audio_path + suffix, audio_path)
+            with open(meta_path + suffix, "w", encoding="utf-8") as f:
+                json.dump({"boundaries": [list(b) for b in boundaries]}, f)
+            os.replace(meta_path + suffix, meta_path)
+        except OSError as e:
+            print(f"TTS cache: could not persist segment ({e}).")
+            return
+
+        with self._lock:
+            self.current_bytes += size + os.path.getsize(meta_path)
+            if self.current_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drops least recently used entries until the cache is back under 90% of its cap."""
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        for key, _, size in entries:
+            if total <= self.max_bytes * 0.9:
+                break
+            for path in self._paths(key)[::-1]: # metadata first -> entry disappears atomically
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+        self.current_bytes = total
+
+    def stats(self):
+        return f"{self.current_bytes / 1e6:.1f} MB | hits {self.hits}, synthesized {self.misses}"
+
+_default_cache = None
+
+def get_tts_cache():
+    """Returns the shared cache configured from config.py, or None when disabled."""
+    global _default_cache
+    if _default_cache is None:
+        from config import TTS_CACHE_DIR, TTS_CACHE_MAX_MB
+        if not TTS_CACHE_DIR:
+            return None
+        _default_cache = TTSCache(TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_MB * 1024 * 1024)
+    return _default_cache
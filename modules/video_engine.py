@@ -1,302 +1,459 @@
-import PIL.Image
-if not hasattr(PIL.Image, 'ANTIALIAS'):
-    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
-
-from moviepy.editor import VideoFileClip, AudioFileClip, vfx, CompositeVideoClip, ImageClip
 import random
 import os
-from modules.subtitle_renderer import add_subtitles
+import uuid
+from modules.subtitle_renderer import SubtitleTrack, load_word_timings, patch_pillow_for_moviepy
+from modules.media_probe import probe_duration
+from modules.background_library import BackgroundLibrary
+from modules.render_profiles import get_render_profile, moviepy_write_kwargs
+from modules.overlay_assets import prepare_overlay, create_overlay_clip
+from modules.timing import timed
+from modules.tracing import span, set_job
+from modules.profiling import run_profiled
 from config import *
 
+RENDER_BACKENDS = ("moviepy", "ffmpeg")
+
+# Overlay / Music Styling
+REFERENCE_HEIGHT = 1920 # Caption sizes are tuned for full-resolution output
+OVERLAY_WIDTH_RATIO = 0.7 # Memes take 70% of the frame width
+OVERLAY_FADE = 0.5
+BGM_VOLUME = 0.12 # 12% Volume
+
 class VideoEngine:
-    def __init__(self):
+    def __init__(self, image_downloader=None, music_provider=None):
+        """
+        image_downloader(query, output_dir, prefix) -> path and music_provider(mood, output_dir) -> path
+        default to the web downloaders; benchmarks pass offline fixtures instead.
+        """
+        self.image_downloader = image_downloader
+        self.music_provider = music_provider
+        self.last_timings = {}
         self.background_path = BACKGROUND_VIDEO_PATH
+        self.top_background_path = "assets/top_backgrounds"
         self.output_path = os.path.join(OUTPUT_VIDEO_PATH, "finished_videos")
         # Ensure dirs exist
         os.makedirs(self.background_path, exist_ok=True)
         os.makedirs(self.output_path, exist_ok=True)
 
+        # Probed manifest (duration, size, keyframes) -> no listdir/probing per render
+        self.library = BackgroundLibrary()
+        self.library.scan([self.background_path, self.top_background_path])
+
     def get_random_background(self):
-        files = [f for f in os.listdir(self.background_path) if f.endswith(('.mp4', '.mov'))]
+        files = self.library.sources(self.background_path)
+        if not files:
+            files = [os.path.join(self.background_path, f) for f in os.listdir(self.background_path) if f.endswith(('.mp4', '.mov'))]
         if not files:
             raise FileNotFoundError(f"No background videos found in {self.background_path}")
-        return os.path.join(self.background_path, random.choice(files))
+        return random.choice(files)
+
+    def get_random_top_background(self):
+        """Satisfying clip for the top half in brainrot mode (None if the library is empty)."""
+        top_files = self.library.sources(self.top_background_path)
+        if not top_files and os.path.exists(self.top_background_path):
+            top_files = [os.path.join(self.top_background_path, f) for f in os.listdir(self.top_background_path) if f.endswith(('.mp4', '.mov'))]
+        if not top_files:
+            return None
+        return random.choice(top_files)
 
-    def create_video(self, audio_path, script_data, sync_path=None, mode="brainrot"):
+    def plan_video(self, audio_path, script_data, sync_path=None, mode="brainrot", profile=None):
+        """
+        Resolves every random choice and external asset for a render up front
+        (backgrounds + seek points, meme downloads, subtitle file, BGM) into a plain dict.
+        Both render backends consume the same plan, so their output is directly comparable.
+        profile: render profile name ("draft", "standard", "final") or profile dict.
+        """
+        download_image = self.image_downloader
+        if download_image is None:
+            from modules.image_downloader import download_image
+
+        if not isinstance(profile, dict):
+            profile = get_render_profile(profile)
+        video_w, video_h = profile["width"], profile["height"]
+
+        audio_duration = probe_duration(audio_path)
+
+        plan = {
+            "mode": mode,
+            "profile": profile,
+            "width": video_w,
+            "height": video_h,
+            "fps": profile["fps"],
+            "duration": audio_duration,
+            "audio_path": audio_path,
+            "backgrounds": [],
+            "overlays": [],
+            "subtitle_file": None,
+            "bgm": None,
+        }
+
+        # --- BACKGROUNDS ---
+        # Brainrot: Top (Satisfying) stacked over Bottom (Gameplay). Classic or Fallback: single layer.
+        bg_video_path = self.get_random_background()
+        top_bg_path = self.get_random_top_background() if mode == "brainrot" else None
+
+        if top_bg_path:
+            print(f"Top Layer: {os.path.basename(top_bg_path)}")
+            layer_paths = [top_bg_path, bg_video_path]
+            layer_h = video_h // 2
+        else:
+            print(f"Using Single Layer (Background: {os.path.basename(bg_video_path)})")
+            layer_paths = [bg_video_path]
+            layer_h = video_h
+
+        for path in layer_paths:
+            # Prefer the pre-normalized variant (already cover-cropped at this geometry)
+            normalized_path = self.library.resolve(path, video_w, layer_h)
+            if normalized_path:
+                print(f"Using normalized background: {os.path.basename(normalized_path)}")
+            layer_path = normalized_path or path
+
+            # Random Seek if too long (snapped to a keyframe), loop from the start if too short
+            picked = self.library.pick_start(layer_path, audio_duration)
+            if picked:
+                start_t, clip_duration = picked
+            else:
+                # Not in the manifest -> probe now, unsnapped seek
+                clip_duration = probe_duration(layer_path)
+                start_t = 0.0
+                if clip_duration > audio_duration:
+                    start_t = random.uniform(0, clip_duration - audio_duration)
+            plan["backgrounds"].append({
+                "path": layer_path,
+                "source_path": path,
+                "normalized": bool(normalized_path),
+                "start": start_t,
+                "source_duration": clip_duration,
+                "width": video_w,
+                "height": layer_h,
+            })
+
+        # --- IMAGE OVERLAYS ---
+        temp_img_dir = "temp_images"
+        os.makedirs(temp_img_dir, exist_ok=True)
+
+        # A. Hook Image
+        hook_mood = script_data.get('hook_mood')
+        if hook_mood:
+            print(f"Downloading Hook Image (Mood: {hook_mood})")
+            hook_path = download_image(hook_mood, temp_img_dir, "hook")
+            self._add_overlay(plan, hook_path, 0, 3)
+
+        # B. Retention Images (Memes)
+        # Prioritize specific "visual_keywords" if available, else fallback to moods
+        visual_queries = script_data.get('visual_keywords', script_data.get('retention_moods', []))
+
+        if visual_queries:
+            # We want them to stay longer (4s), so we might fit fewer images
+            # Calculate how many 4s images fit in the available time
+            available_time = audio_duration - 4 # buffer for hook
+
+            # Limit number of images to prevent overcrowding
+            # If we have 20s available, we can fit ~5 images
+            max_images = int(available_time / 4.5)
+            if max_images < 1: max_images = 1
+
+            # Take top N queries
+            queries_to_use = visual_queries[:max_images]
+
+            if available_time > 0:
+                # Evenly distributed centers
+                interval = available_time / (len(queries_to_use) + 1)
+
+                for i, query in enumerate(queries_to_use):
+                    print(f"Downloading Retention Image (Query: {query})")
+                    # Add 'meme' to query if not present for better results
+                    search_q = query if "meme" in query.lower() else f"{query} meme funny"
+
+                    path = download_image(search_q, temp_img_dir, f"retention_{i}")
+
+                    # Start time: Hook end (3s) + interval step
+                    # Duration: 4 seconds (User Request)
+                    self._add_overlay(plan, path, 3 + (i * interval), 4.0)
+
+        # --- SUBTITLES ---
+        subtitle_file = sync_path
+
+        if not subtitle_file or not os.path.exists(subtitle_file):
+            base_name = os.path.splitext(audio_path)[0]
+            if os.path.exists(base_name + ".json"):
+                subtitle_file = base_name + ".json"
+            elif os.path.exists(base_name + ".vtt"):
+                subtitle_file = base_name + ".vtt"
+
+        if subtitle_file and os.path.exists(subtitle_file):
+            plan["subtitle_file"] = subtitle_file
+        else:
+            print("Warning: No subtitle file found. Skipping subtitles.")
+
+        # --- BACKGROUND MUSIC ---
+        if not profile["bgm"]:
+            print(f"Background Music skipped ({profile['name']} profile).")
+            return plan
+
+        try:
+            get_music_for_mood = self.music_provider
+            if get_music_for_mood is None:
+                from modules.music_downloader import get_music_for_mood
+
+            mood = script_data.get('hook_mood', 'Neutral')
+            print(f"Fetching Background Music for Mood: {mood}")
+            bgm_path = get_music_for_mood(mood, "assets/music")
+
+            if bgm_path and os.path.exists(bgm_path):
+                # Random Start: pick a random point in the song, loop if we hit the end
+                bgm_duration = probe_duration(bgm_path)
+                bgm_start = random.uniform(0, bgm_duration) if bgm_duration > 0 else 0
+                plan["bgm"] = {"path": bgm_path, "start": bgm_start, "volume": BGM_VOLUME}
+            else:
+                print("Background Music skipped (Download failed or file missing).")
+        except Exception as e:
+            print(f"Background Music Warning: {e}")
+            # non-critical, proceed with just voice
+
+        return plan
+
+    def _add_overlay(self, plan, img_path, start_t, duration_t):
+        """Prepares (decode, validate, pre-size to 70% width) a downloaded image and adds it to the plan."""
+        if not img_path:
+            return
+        prepared = prepare_overlay(img_path, plan["width"] * OVERLAY_WIDTH_RATIO)
+        if not prepared:
+            return
+        path, w, h = prepared
+        plan["overlays"].append({"path": path, "source_path": img_path, "width": w, "height": h,
+                                 "start": start_t, "duration": duration_t})
+
+    def create_video(self, audio_path, script_data, sync_path=None, mode="brainrot", backend="moviepy", chunk_workers=None, profile=None):
         """
         Merges background video with audio AND image overlays.
         mode: "brainrot" (Split Screen) or "classic" (Full Gameplay)
+        backend: "moviepy" (Python compositing) or "ffmpeg" (single native filtergraph)
+        chunk_workers: MoviePy only. Render N time ranges in parallel processes and concat them.
+        profile: render quality profile ("draft", "standard", "final"; default final)
         """
         import json
         print(f"DEBUG SCRIPT DATA: {json.dumps(script_data, indent=2)}")
+        if backend not in RENDER_BACKENDS:
+            raise ValueError(f"Unknown render backend '{backend}' (expected one of {RENDER_BACKENDS})")
+
+        timings = {}
+        self.last_timings = timings
         try:
-            # MoviePy 1.x imports
-            from moviepy.editor import VideoFileClip, AudioFileClip, CompositeVideoClip, ImageClip
-            import moviepy.video.fx.all as vfx
-            
-            from modules.image_downloader import download_image
-            import math
-
-            # Load Background Video (Bottom/Full)
-            bg_video_path = self.get_random_background()
-            
-            # Load Top Background (Satisfying) - Only used in brainrot mode
-            top_bg_dir = "assets/top_backgrounds"
-            top_bg_path = None
-            if mode == "brainrot" and os.path.exists(top_bg_dir):
-                top_files = [f for f in os.listdir(top_bg_dir) if f.endswith(('.mp4', '.mov'))]
-                if top_files:
-                    top_bg_path = os.path.join(top_bg_dir, random.choice(top_files))
-            
-            # --- HELPER: Process Background Clip ---
-            def prepare_bg_clip(path, target_duration, is_split=False):
-                clip = VideoFileClip(path)
-                # Loop if too short
-                if clip.duration < target_duration:
-                    clip = vfx.loop(clip, duration=target_duration)
-                # Random Seek if too long
-                if clip.duration > target_duration:
-                    max_start = clip.duration - target_duration
-                    start_t = random.uniform(0, max_start)
-                    clip = clip.subclip(start_t, start_t + target_duration)
-                else:
-                    clip = clip.set_duration(target_duration)
-                
-                # --- ROBUST CROP "COVER" LOGIC ---
-                # Target: 1080x960 (Split) OR 1080x1920 (Classic)
-                target_w = 1080
-                target_h = 960 if is_split else 1920
-                
-                # Current dimensions
-                w, h = clip.size
-                
-                # Calculate Aspect Ratios
-                target_ratio = target_w / target_h
-                current_ratio = w / h
-                
-                if current_ratio > target_ratio:
-                    # Video is Wider than target -> Resize by Height
-                    new_h = target_h
-                    new_w = int(w * (target_h / h))
-                    clip = clip.resize(height=new_h)
-                    
-                    # Center Crop Width
-                    clip = vfx.crop(clip, x1=(new_w//2 - target_w//2), width=target_w, height=target_h)
-                else:
-                    # Video is Taller/Narrower -> Resize by Width
-                    new_w = target_w
-                    new_h = int(h * (target_w / w))
-                    clip = clip.resize(width=new_w)
-                    
-                    # Center Crop Height
-                    clip = vfx.crop(clip, y1=(new_h//2 - target_h//2), width=target_w, height=target_h)
-                
-                return clip
-
-            # Load Audio
-            audio_clip = AudioFileClip(audio_path)
-            audio_duration = audio_clip.duration
-
-            print(f"Processing Video (Mode: {mode})...")
-            
-            if mode == "brainrot" and top_bg_path:
-                print(f"Top Layer: {os.path.basename(top_bg_path)}")
-                # Prepare half-height clips
-                bottom_clip = prepare_bg_clip(bg_video_path, audio_duration, is_split=True)
-                top_clip = prepare_bg_clip(top_bg_path, audio_duration, is_split=True)
-                
-                # Stack Logic: Top on top, Bottom on bottom
-                from moviepy.editor import clips_array
-                video_clip = clips_array([[top_clip], [bottom_clip]])
-            else:
-                # Classic Mode or Fallback
-                print(f"Using Single Layer (Background: {os.path.basename(bg_video_path)})")
-                video_clip = prepare_bg_clip(bg_video_path, audio_duration, is_split=False)
-            
-            final_w, final_h = video_clip.size
-
-            # --- IMAGE OVERLAY PREPARATION ---
-            # 1. Download Images
-            temp_img_dir = "temp_images"
-            os.makedirs(temp_img_dir, exist_ok=True)
-            
-            image_clips = []
-            
-            # Helper: styled image clip (1.x syntax)
-            def create_centered_image_clip(img_path, start_t, duration_t):
-                if not img_path: return None
-                img = ImageClip(img_path).set_start(start_t).set_duration(duration_t)
-                
-                # Resize to 70% width
-                target_img_w = final_w * 0.7
-                img = img.resize(width=target_img_w)
-                
-                # Center it
-                img = img.set_position(("center", "center"))
-                
-                # Revert to Fade In (Pop animation caused visibility issues)
-                img = img.crossfadein(0.5)
-                
-                # Simple Fade Out at end
-                img = img.crossfadeout(0.5)
-                
-                return img
-
-            # A. Hook Image
-            hook_mood = script_data.get('hook_mood')
-            if hook_mood:
-                print(f"Downloading Hook Image (Mood: {hook_mood})")
-                hook_path = download_image(hook_mood, temp_img_dir, "hook")
-                hook_clip = create_centered_image_clip(hook_path, 0, 3)
-                if hook_clip: image_clips.append(hook_clip)
-
-            # B. Retention Images (Memes)
-            # Prioritize specific "visual_keywords" if available, else fallback to moods
-            visual_queries = script_data.get('visual_keywords', script_data.get('retention_moods', []))
-            
-            if visual_queries:
-                # We want them to stay longer (4s), so we might fit fewer images
-                # Calculate how many 4s images fit in the available time
-                available_time = audio_duration - 4 # buffer for hook
-                
-                # Limit number of images to prevent overcrowding
-                # If we have 20s available, we can fit ~5 images
-                max_images = int(available_time / 4.5) 
-                if max_images < 1: max_images = 1
-                
-                # Take top N queries
-                queries_to_use = visual_queries[:max_images]
-                
-                if available_time > 0:
-                    # Space them out evenly or just back-to-back?
-                    # Let's do evenly distributed centers
-                    interval = available_time / (len(queries_to_use) + 1)
-                    
-                    for i, query in enumerate(queries_to_use):
-                        print(f"Downloading Retention Image (Query: {query})")
-                        # Add 'meme' to query if not present for better results
-                        search_q = query if "meme" in query.lower() else f"{query} meme funny"
-                        
-                        path = download_image(search_q, temp_img_dir, f"retention_{i}")
-                        
-                        # Start time: Hook end (3s) + interval step
-                        start_t = 3 + (i * interval)
-                        
-                        # Duration: 4 seconds (User Request)
-                        clip = create_centered_image_clip(path, start_t, 4.0)
-                        if clip: image_clips.append(clip)
-
-            # --- COMPOSITING ---
-            # Layer 1: Background Video
-            # Layer 2: Image Overlays
-            
-            # --- COMPOSITING ---
-            # Layer Order: Background < Images < Subtitles
-            # Flattening the layers into a single CompositeVideoClip for stability
-            
-            final_layers = [video_clip] + image_clips
-
-            # --- SUBTITLES ---
-            subtitle_file = sync_path
-            
-            if not subtitle_file or not os.path.exists(subtitle_file):
-                base_name = os.path.splitext(audio_path)[0]
-                if os.path.exists(base_name + ".json"):
-                    subtitle_file = base_name + ".json"
-                elif os.path.exists(base_name + ".vtt"):
-                    subtitle_file = base_name + ".vtt"
-
-            if subtitle_file and os.path.exists(subtitle_file):
-                print(f"Adding subtitles from {os.path.basename(subtitle_file)}...")
-                sub_clips = add_subtitles(video_clip, subtitle_file, font_path=FONT_PATH, return_clips=True)
-                final_layers.extend(sub_clips)
-            else:
-                print("Warning: No subtitle file found. Skipping subtitles.")
-
-            # Final Stitch
-            final_clip = CompositeVideoClip(final_layers)
-            final_clip = final_clip.set_audio(audio_clip)
-            
-            # --- 6. Audio Mixing (TTS + BGM) ---
-            final_audio = audio_clip # Use the loaded audio_clip as the base for final_audio
-            
-            try:
-                from modules.music_downloader import get_music_for_mood
-                from moviepy.editor import AudioFileClip, CompositeAudioClip, afx
-                
-                # 1. Get Mood
-                mood = script_data.get('hook_mood', 'Neutral')
-                print(f"Fetching Background Music for Mood: {mood}")
-                
-                # 2. Get/Download Track
-                bgm_path = get_music_for_mood(mood, "assets/music")
-                
-                if bgm_path and os.path.exists(bgm_path):
-                    # 3. Load & Process BGM
-                    bgm_clip = AudioFileClip(bgm_path)
-                    
-                    # Random Start Logic
-                    # Pick a random point in the song to start
-                    if bgm_clip.duration > 0:
-                        bgm_start = random.uniform(0, bgm_clip.duration)
-                    else:
-                        bgm_start = 0
-                        
-                    # Calculate total duration needed to support starting late + video length
-                    needed_duration = bgm_start + final_clip.duration + 1.0 # +1s buffer
-                    
-                    # Loop the track enough times to cover the needed duration
-                    # afx.audio_loop repeats the clip content
-                    bgm_looped = bgm_clip.fx(afx.audio_loop, duration=needed_duration)
-                    
-                    # Cut the segment from [start, start + duration]
-                    # This achieves the "Random Start + Loop if hit end" behavior
-                    bgm_clip = bgm_looped.subclip(bgm_start, bgm_start + final_clip.duration)
-                    
-                    # Set Volume (Low Ambience)
-                    
-                    # Set Volume (Low Ambience)
-                    bgm_clip = bgm_clip.volumex(0.12) # 12% Volume
-                    
-                    # Trim exactly to video length
-                    bgm_clip = bgm_clip.subclip(0, final_clip.duration)
-                    
-                    # 4. Mix
-                    final_audio = CompositeAudioClip([audio_clip, bgm_clip]) # Use audio_clip here
-                    print("Background Music Mixed Successfully.")
-                else:
-                    print("Background Music skipped (Download failed or file missing).")
-                    
-            except Exception as e:
-                print(f"Background Music Warning: {e}")
-                # non-critical, proceed with just voice
-            
-            final_clip = final_clip.set_audio(final_audio)
-
-            # --- 7. Write Output ---
-            final_filename = f"final_{random.randint(1000,9999)}.mp4"
-            output_filepath = os.path.join(self.output_path, final_filename)
-            
-            print(f"Rendering Video to {output_filepath}...")
-            final_clip.write_videofile(
-                output_filepath, 
-                codec='libx264', 
-                audio_codec='aac', 
-                temp_audiofile='temp-audio.m4a', 
-                remove_temp=True,
-                fps=30,
-                preset='medium',
-                ffmpeg_params=['-pix_fmt', 'yuv420p']
-            )
-            
-            final_clip.close()
-            video_clip.close() 
-            audio_clip.close()
-            
-            return output_filepath
+            print(f"Processing Video (Mode: {mode} | Backend: {backend} | Profile: {profile or 'final'})...")
+            with timed(timings, "plan"):
+                plan = self.plan_video(audio_path, script_data, sync_path=sync_path, mode=mode, profile=profile)
+
+            return self.render_plan(plan, backend=backend, chunk_workers=chunk_workers, timings=timings)
 
         except Exception as e:
-            print(f"Error creating video with MoviePy: {e}")
+            print(f"Error creating video with {backend}: {e}")
             import traceback
             traceback.print_exc()
             return None
+
+    def render_plan(self, plan, backend="moviepy", chunk_workers=None, timings=None, job_id=None):
+        """
+        Renders an already planned video (assets downloaded, backgrounds picked).
+        Split from create_video so the job pipeline can plan ahead while another video renders.
+        Returns the output path; raises on failure.
+        """
+        return render_plan(plan, self.output_path, backend=backend, chunk_workers=chunk_workers, timings=timings,
+                           job_id=job_id)
+
+def render_plan(plan, output_dir, backend="moviepy", chunk_workers=None, timings=None, job_id=None):
+    """
+    Module-level so render worker processes can run it without building a VideoEngine.
+    The output is named after job_id (unique across processes/hosts), else a random id.
+    """
+    if backend not in RENDER_BACKENDS:
+        raise ValueError(f"Unknown render backend '{backend}' (expected one of {RENDER_BACKENDS})")
+
+    # --- Write Output ---
+    final_filename = f"final_{job_id or uuid.uuid4().hex[:12]}.mp4"
+    output_filepath = os.path.join(output_dir, final_filename)
+
+    print(f"Rendering Video to {output_filepath}...")
+    if backend == "ffmpeg":
+        from modules.ffmpeg_renderer import render_with_ffmpeg
+        render_with_ffmpeg(plan, output_filepath, timings=timings)
+    elif chunk_workers and chunk_workers > 1:
+        from modules.chunked_render import render_chunked
+        with timed(timings, "render_chunked"):
+            render_chunked(plan, output_filepath, chunk_workers)
+    else:
+        render_with_moviepy(plan, output_filepath, timings=timings)
+
+    return output_filepath
+
+def render_job(plan, output_dir, backend="moviepy", threads=None, job_id=None):
+    """
+    Render pool worker entry point (main.py --workers).
+    threads: encoder thread budget for this worker so parallel renders don't oversubscribe the cores.
+    Returns (output_path, per-phase timings).
+    """
+    set_job(job_id) # trace spans from this worker belong to the coordinator's job
+    if threads:
+        plan = dict(plan, profile=dict(plan["profile"], threads=threads))
+    timings = {}
+    output_filepath = run_profiled(job_id, "render", render_plan, plan, output_dir, backend=backend, timings=timings,
+                                   job_id=job_id)
+    return output_filepath, timings
+
+def prepare_bg_clip(layer, target_duration):
+    """Loads one background layer, seeks/loops it to the target duration and cover-crops it."""
+    # moviepy.editor (not the submodules): it also patches clip.resize() & co. onto VideoClip
+    from moviepy.editor import VideoFileClip
+    import moviepy.video.fx.all as vfx
+    patch_pillow_for_moviepy()
+
+    with span("video.background_load", path=layer["path"], normalized=layer.get("normalized", False)):
+        clip = VideoFileClip(layer["path"])
+    # Loop if too short
+    if clip.duration < target_duration:
+        clip = vfx.loop(clip, duration=target_duration)
+    # Seek to the planned start if too long
+    if clip.duration > target_duration:
+        start_t = layer["start"]
+        clip = clip.subclip(start_t, start_t + target_duration)
+    else:
+        clip = clip.set_duration(target_duration)
+
+    # --- ROBUST CROP "COVER" LOGIC ---
+    # Target: 1080x960 (Split) OR 1080x1920 (Classic)
+    target_w = layer["width"]
+    target_h = layer["height"]
+
+    # Current dimensions
+    w, h = clip.size
+
+    # Normalized library variants are already cover-cropped -> no per-frame resize
+    if (w, h) == (target_w, target_h):
+        return clip
+
+    # Calculate Aspect Ratios
+    target_ratio = target_w / target_h
+    current_ratio = w / h
+
+    if current_ratio > target_ratio:
+        # Video is Wider than target -> Resize by Height
+        new_h = target_h
+        new_w = int(w * (target_h / h))
+        clip = clip.resize(height=new_h)
+
+        # Center Crop Width
+        clip = vfx.crop(clip, x1=(new_w//2 - target_w//2), width=target_w, height=target_h)
+    else:
+        # Video is Taller/Narrower -> Resize by Width
+        new_w = target_w
+        new_h = int(h * (target_w / w))
+        clip = clip.resize(width=new_w)
+
+        # Center Crop Height
+        clip = vfx.crop(clip, y1=(new_h//2 - target_h//2), width=target_w, height=target_h)
+
+    return clip
+
+def build_moviepy_audio(plan):
+    """
+    Narration + looped, attenuated BGM as one MoviePy audio clip.
+    Returns (final_audio, narration_clip); close the narration clip when done.
+    """
+    from moviepy.editor import AudioFileClip, CompositeAudioClip, afx
+
+    duration = plan["duration"]
+    audio_clip = AudioFileClip(plan["audio_path"])
+
+    # --- Audio Mixing (TTS + BGM) ---
+    final_audio = audio_clip
+    bgm = plan["bgm"]
+    if bgm:
+        try:
+            bgm_clip = AudioFileClip(bgm["path"])
+
+            # Calculate total duration needed to support starting late + video length
+            needed_duration = bgm["start"] + duration + 1.0 # +1s buffer
+
+            # Loop the track enough times to cover the needed duration, then cut
+            # [start, start + duration] -> "Random Start + Loop if hit end"
+            bgm_looped = bgm_clip.fx(afx.audio_loop, duration=needed_duration)
+            bgm_clip = bgm_looped.subclip(bgm["start"], bgm["start"] + duration)
+
+            # Set Volume (Low Ambience)
+            bgm_clip = bgm_clip.volumex(bgm["volume"])
+
+            # Trim exactly to video length
+            bgm_clip = bgm_clip.subclip(0, duration)
+
+            final_audio = CompositeAudioClip([audio_clip, bgm_clip])
+            print("Background Music Mixed Successfully.")
+        except Exception as e:
+            print(f"Background Music Warning: {e}")
+            # non-critical, proceed with just voice
+
+    return final_audio, audio_clip
+
+def build_moviepy_clip(plan, with_audio=True):
+    """
+    Builds the full MoviePy composite (video + mixed audio) for a render plan.
+    Layer Order: Background < Images < Subtitles
+    Returns (final_clip, source_clips_to_close).
+    """
+    from moviepy.editor import CompositeVideoClip, clips_array
+
+    duration = plan["duration"]
+
+    # --- BACKGROUND ---
+    bg_clips = [prepare_bg_clip(layer, duration) for layer in plan["backgrounds"]]
+    if len(bg_clips) > 1:
+        # Stack Logic: Top on top, Bottom on bottom
+        video_clip = clips_array([[c] for c in bg_clips])
+    else:
+        video_clip = bg_clips[0]
+
+    final_w, final_h = video_clip.size
+
+    # --- IMAGE OVERLAYS ---
+    # Pre-sized RGBA assets with a precomputed fade ramp (no per-frame resize)
+    image_clips = [create_overlay_clip(o, plan["fps"], OVERLAY_FADE) for o in plan["overlays"]]
+
+    # Flattening the layers into a single CompositeVideoClip for stability
+    final_clip = CompositeVideoClip([video_clip] + image_clips)
+
+    # --- SUBTITLES ---
+    # One track blended on top of the composite (not one layer per word)
+    if plan["subtitle_file"]:
+        print(f"Adding subtitles from {os.path.basename(plan['subtitle_file'])}...")
+        with span("video.subtitles_build"):
+            track = SubtitleTrack(load_word_timings(plan["subtitle_file"]), final_w, final_h,
+                                  font_path=FONT_PATH, fps=plan["fps"], scale=final_h / REFERENCE_HEIGHT)
+            final_clip = track.apply(final_clip)
+
+    sources = [video_clip]
+    if with_audio:
+        final_audio, audio_clip = build_moviepy_audio(plan)
+        final_clip = final_clip.set_audio(final_audio)
+        sources.append(audio_clip)
+    return final_clip, sources
+
+def render_with_moviepy(plan, output_filepath, timings=None):
+    """
+    Composites every frame in Python and encodes with write_videofile.
+    timings: optional dict that receives per-phase wall times.
+    """
+    with timed(timings, "build_clips"):
+        final_clip, sources = build_moviepy_clip(plan)
+
+    with timed(timings, "composite_encode"):
+        final_clip.write_videofile(
+            output_filepath,
+            audio_codec='aac',
+            temp_audiofile=os.path.splitext(output_filepath)[0] + '_temp-audio.m4a', # unique per render (parallel workers)
+            remove_temp=True,
+            **moviepy_write_kwargs(plan["profile"])
+        )
+
+    final_clip.close()
+    for clip in sources:
+        clip.close()
+    return output_filepath
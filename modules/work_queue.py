@@ -0,0 +1,148 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# Shared Work Queue (several main.py processes, on one host or a shared filesystem)
+# A small SQLite file coordinates who works on what:
+# - posts: each Reddit post is claimed once (INSERT OR IGNORE), so two workers never make the same video.
+# - jobs:  each job is leased by one worker. The worker's heartbeat keeps its leases alive; when a
+#          worker dies its leases expire and `--resume` on any worker can take the job over.
+# Job data itself stays in the job journal (output/jobs/*.json); the queue only holds ownership.
+# Needs a filesystem with working file locks (local disk, NFSv4, SMB); on network shares turn WAL off.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    post_id TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    claimed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    worker TEXT NOT NULL,
+    status TEXT NOT NULL,          -- running / done / failed
+    stage TEXT,                    -- last completed stage
+    lease_until REAL NOT NULL,
+    heartbeat_at REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_worker ON jobs (worker, status);
+"""
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class WorkQueue:
+    def __init__(self, db_path, lease_seconds=120, worker_id=None, wal=True):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or default_worker_id()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # Autocommit; multi-statement claims use BEGIN IMMEDIATE (takes the write lock up front)
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            if wal:
+                # Readers don't block the writer. Not supported on network filesystems -> pass wal=False.
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _lease(self):
+        return time.time() + self.lease_seconds
+
+    # --- Posts ---
+
+    def claim_post(self, post_id, job_id):
+        """True if this job now owns the post; False if any worker (this run or an earlier one) already took it."""
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO posts (post_id, job_id, worker, claimed_at) VALUES (?, ?, ?, ?)",
+                (post_id, job_id, self.worker_id, time.time()))
+            return cur.rowcount == 1
+
+    # --- Jobs ---
+
+    def add_job(self, job_id):
+        """Registers a new job leased to this worker."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, worker, status, lease_until, heartbeat_at, created_at) "
+                "VALUES (?, ?, 'running', ?, ?, ?)",
+                (job_id, self.worker_id, self._lease(), now, now))
+
+    def claim_job(self, job_id):
+        """
+        Takes over an unfinished job (--resume). Succeeds if nobody holds a live lease on it:
+        it failed, its worker stopped heartbeating, or it predates the queue (journal only).
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT status, lease_until, worker FROM jobs WHERE job_id = ?",
+                                         (job_id,)).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO jobs (job_id, worker, status, lease_until, heartbeat_at, created_at) "
+                        "VALUES (?, ?, 'running', ?, ?, ?)",
+                        (job_id, self.worker_id, self._lease(), now, now))
+                else:
+                    status, lease_until, worker = row
+                    live = status == "running" and lease_until > now and worker != self.worker_id
+                    if status == "done" or live:
+                        self._conn.execute("ROLLBACK")
+                        return False
+                    self._conn.execute(
+                        "UPDATE jobs SET worker = ?, status = 'running', lease_until = ?, heartbeat_at = ? WHERE job_id = ?",
+                        (self.worker_id, self._lease(), now, job_id))
+                self._conn.execute("COMMIT")
+                return True
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def checkpoint(self, job_id, stage):
+        """Records progress (and renews the lease) for a job this worker holds."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET stage = ?, lease_until = ?, heartbeat_at = ? WHERE job_id = ? AND worker = ?",
+                (stage, self._lease(), time.time(), job_id, self.worker_id))
+
+    def finish(self, job_id, status):
+        """status: 'done' or 'failed' (failed jobs can be claimed again right away)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, lease_until = 0 WHERE job_id = ? AND worker = ?",
+                (status, job_id, self.worker_id))
+
+    def heartbeat(self):
+        """Renews the lease of every running job of this worker. Returns how many it renewed."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET lease_until = ?, heartbeat_at = ? WHERE worker = ? AND status = 'running'",
+                (self._lease(), time.time(), self.worker_id))
+            return cur.rowcount
+
+    def release(self):
+        """Gives up this worker's running jobs (clean shutdown) so other workers can resume them immediately."""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET lease_until = 0 WHERE worker = ? AND status = 'running'",
+                               (self.worker_id,))
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, lease_until > ? AS live, COUNT(*) FROM jobs GROUP BY status, live", (now,)).fetchall()
+            posts = self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+        counts = {"posts": posts, "running": 0, "expired": 0, "done": 0, "failed": 0}
+        for status, live, n in rows:
+            key = "expired" if status == "running" and not live else status
+            counts[key] = counts.get(key, 0) + n
+        return counts
@@ -5,7 +5,6 @@ import random
 import glob
 import shutil
 from pathlib import Path
-from instagrapi import Client
 
 # Configuration
 INPUT_DIR = "output/finished_videos"
@@ -53,10 +52,11 @@ def login(cl, config):
         print(f"Login failed: {e}")
         return False
 
-from instagrapi.exceptions import LoginRequired, VideoNotUpload, ClipNotUpload
-
 def upload_loop():
     print("--- Instagram Drip-Feed Scheduler ---")
+    # instagrapi (pydantic models) is slow to import; only load it when we actually upload
+    from instagrapi import Client
+    from instagrapi.exceptions import LoginRequired, VideoNotUpload, ClipNotUpload
     config = load_config()
     cl = Client()
 